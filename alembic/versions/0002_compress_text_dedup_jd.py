@@ -0,0 +1,132 @@
+"""compress large text columns, deduplicate JDs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00.000000
+
+Resume.text and Analysis.analysis_text become compressed blobs (see
+backend/app/db_types.py) and Analysis.jd moves to a job_descriptions table
+keyed by SHA-256, referenced through analyses.jd_id. Existing rows are
+converted BATCH_SIZE at a time into new columns, then the old columns are
+dropped and the new ones renamed.
+"""
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+from backend.app.db_types import compress_text, decompress_text
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+
+def _batches(conn, table, columns):
+    """Rows of table in id order, BATCH_SIZE at a time (keyset pagination)"""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(table.c.id, *[table.c[c] for c in columns])
+            .where(table.c.id > last_id).order_by(table.c.id).limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    op.create_table(
+        'job_descriptions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('text', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now())
+    )
+    op.create_index('ix_job_descriptions_sha256', 'job_descriptions', ['sha256'], unique=True)
+    op.add_column('resumes', sa.Column('text_z', sa.LargeBinary(), nullable=True))
+    op.add_column('analyses', sa.Column('jd_id', sa.Integer(), nullable=True))
+    op.add_column('analyses', sa.Column('analysis_text_z', sa.LargeBinary(), nullable=True))
+
+    conn = op.get_bind()
+    resumes = sa.table('resumes', sa.column('id', sa.Integer), sa.column('text', sa.Text),
+                       sa.column('text_z', sa.LargeBinary))
+    analyses = sa.table('analyses', sa.column('id', sa.Integer), sa.column('jd', sa.Text),
+                        sa.column('jd_id', sa.Integer), sa.column('analysis_text', sa.Text),
+                        sa.column('analysis_text_z', sa.LargeBinary))
+    jds = sa.table('job_descriptions', sa.column('id', sa.Integer), sa.column('sha256', sa.String),
+                   sa.column('text', sa.LargeBinary))
+
+    for rows in _batches(conn, resumes, ['text']):
+        for row_id, text in rows:
+            conn.execute(resumes.update().where(resumes.c.id == row_id)
+                         .values(text_z=compress_text(text or "")))
+
+    jd_ids = {}
+    for rows in _batches(conn, analyses, ['jd', 'analysis_text']):
+        for row_id, jd, analysis_text in rows:
+            values = {"analysis_text_z": compress_text(analysis_text) if analysis_text is not None else None}
+            if jd is not None:
+                text = jd.strip()
+                sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                if sha not in jd_ids:
+                    jd_ids[sha] = conn.execute(
+                        jds.insert().values(sha256=sha, text=compress_text(text)).returning(jds.c.id)
+                    ).scalar_one()
+                values["jd_id"] = jd_ids[sha]
+            conn.execute(analyses.update().where(analyses.c.id == row_id).values(**values))
+
+    with op.batch_alter_table('resumes') as batch:
+        batch.drop_column('text')
+        batch.alter_column('text_z', new_column_name='text', existing_type=sa.LargeBinary(), nullable=False)
+    with op.batch_alter_table('analyses') as batch:
+        batch.drop_column('jd')
+        batch.drop_column('analysis_text')
+        batch.alter_column('analysis_text_z', new_column_name='analysis_text', existing_type=sa.LargeBinary())
+        batch.create_foreign_key('fk_analyses_jd_id', 'job_descriptions', ['jd_id'], ['id'])
+        batch.create_index('ix_analyses_jd_id', ['jd_id'])
+
+
+def downgrade():
+    op.add_column('resumes', sa.Column('text_plain', sa.Text(), nullable=True))
+    op.add_column('analyses', sa.Column('jd', sa.Text(), nullable=True))
+    op.add_column('analyses', sa.Column('analysis_text_plain', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    resumes = sa.table('resumes', sa.column('id', sa.Integer), sa.column('text', sa.LargeBinary),
+                       sa.column('text_plain', sa.Text))
+    analyses = sa.table('analyses', sa.column('id', sa.Integer), sa.column('jd', sa.Text),
+                        sa.column('jd_id', sa.Integer), sa.column('analysis_text', sa.LargeBinary),
+                        sa.column('analysis_text_plain', sa.Text))
+    jds = sa.table('job_descriptions', sa.column('id', sa.Integer), sa.column('text', sa.LargeBinary))
+
+    for rows in _batches(conn, resumes, ['text']):
+        for row_id, text in rows:
+            conn.execute(resumes.update().where(resumes.c.id == row_id)
+                         .values(text_plain=decompress_text(text)))
+
+    jd_texts = {}
+    for rows in _batches(conn, analyses, ['jd_id', 'analysis_text']):
+        for row_id, jd_id, analysis_text in rows:
+            if jd_id is not None and jd_id not in jd_texts:
+                blob = conn.execute(sa.select(jds.c.text).where(jds.c.id == jd_id)).scalar_one()
+                jd_texts[jd_id] = decompress_text(blob)
+            conn.execute(analyses.update().where(analyses.c.id == row_id).values(
+                jd=jd_texts.get(jd_id),
+                analysis_text_plain=decompress_text(analysis_text) if analysis_text is not None else None,
+            ))
+
+    with op.batch_alter_table('resumes') as batch:
+        batch.drop_column('text')
+        batch.alter_column('text_plain', new_column_name='text', existing_type=sa.Text(), nullable=False)
+    with op.batch_alter_table('analyses') as batch:
+        batch.drop_index('ix_analyses_jd_id')
+        batch.drop_constraint('fk_analyses_jd_id', type_='foreignkey')
+        batch.drop_column('jd_id')
+        batch.drop_column('analysis_text')
+        batch.alter_column('analysis_text_plain', new_column_name='analysis_text', existing_type=sa.Text())
+    op.drop_index('ix_job_descriptions_sha256', table_name='job_descriptions')
+    op.drop_table('job_descriptions')
@@ -0,0 +1,48 @@
+"""job postings and precomputed JD artifacts
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('job_descriptions') as batch:
+        batch.add_column(sa.Column('keywords', sa.Text(), nullable=True))
+        batch.add_column(sa.Column('requirements', sa.LargeBinary(), nullable=True))
+        batch.add_column(sa.Column('embedding', sa.LargeBinary(), nullable=True))
+        batch.add_column(sa.Column('requirement_embeddings', sa.LargeBinary(), nullable=True))
+        batch.add_column(sa.Column('embedding_model', sa.String(length=255), nullable=True))
+    op.create_table(
+        'job_postings',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('company', sa.String(length=255), nullable=True),
+        sa.Column('jd_id', sa.Integer(), sa.ForeignKey('job_descriptions.id'), nullable=False),
+        sa.Column('status', sa.String(length=20), server_default='open'),
+        sa.Column('artifacts_status', sa.String(length=20), server_default='pending'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now())
+    )
+    op.create_index('ix_job_postings_owner_id', 'job_postings', ['owner_id'])
+    op.create_index('ix_job_postings_status', 'job_postings', ['status'])
+
+def downgrade():
+    op.drop_index('ix_job_postings_status', table_name='job_postings')
+    op.drop_index('ix_job_postings_owner_id', table_name='job_postings')
+    op.drop_table('job_postings')
+    with op.batch_alter_table('job_descriptions') as batch:
+        batch.drop_column('embedding_model')
+        batch.drop_column('requirement_embeddings')
+        batch.drop_column('embedding')
+        batch.drop_column('requirements')
+        batch.drop_column('keywords')
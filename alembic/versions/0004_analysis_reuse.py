@@ -0,0 +1,37 @@
+"""analysis reuse and idempotency keys
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('resumes') as batch:
+        batch.add_column(sa.Column('content_sha256', sa.String(length=64), nullable=True))
+        batch.create_index('ix_resumes_content_sha256', ['content_sha256'])
+    with op.batch_alter_table('analyses') as batch:
+        batch.add_column(sa.Column('model', sa.String(length=255), nullable=True))
+        batch.add_column(sa.Column('degraded', sa.Boolean(), nullable=True, server_default=sa.false()))
+        batch.add_column(sa.Column('idempotency_key', sa.String(length=255), nullable=True))
+        batch.add_column(sa.Column('result_json', sa.LargeBinary(), nullable=True))
+        batch.create_index('ix_analyses_idempotency_key', ['idempotency_key'])
+
+def downgrade():
+    with op.batch_alter_table('analyses') as batch:
+        batch.drop_index('ix_analyses_idempotency_key')
+        batch.drop_column('result_json')
+        batch.drop_column('idempotency_key')
+        batch.drop_column('degraded')
+        batch.drop_column('model')
+    with op.batch_alter_table('resumes') as batch:
+        batch.drop_index('ix_resumes_content_sha256')
+        batch.drop_column('content_sha256')
@@ -0,0 +1,37 @@
+"""idempotency keys of requests that shared an analysis
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'analysis_keys',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('idempotency_key', sa.String(length=255), nullable=True),
+        sa.Column('analysis_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['analysis_id'], ['analyses.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_analysis_keys_id', 'analysis_keys', ['id'])
+    op.create_index('ix_analysis_keys_user_id', 'analysis_keys', ['user_id'])
+    op.create_index('ix_analysis_keys_idempotency_key', 'analysis_keys', ['idempotency_key'])
+
+def downgrade():
+    op.drop_index('ix_analysis_keys_idempotency_key', table_name='analysis_keys')
+    op.drop_index('ix_analysis_keys_user_id', table_name='analysis_keys')
+    op.drop_index('ix_analysis_keys_id', table_name='analysis_keys')
+    op.drop_table('analysis_keys')
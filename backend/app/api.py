@@ -1,19 +1,37 @@
-from fastapi import UploadFile, File, Form, Depends, HTTPException, status
+from fastapi import UploadFile, File, Form, Query, Depends, Header, HTTPException, BackgroundTasks, status
 from fastapi.responses import JSONResponse
 from .database import engine, Base, SessionLocal
 from . import models, crud, schemas
-from .auth import create_access_token, verify_password, get_current_user, hash_password
+from .auth import create_access_token, verify_password_async, get_current_user, hash_password_async
 from backend.services.parser import parse_upload
-from backend.services.ollama_client import call_ollama
+from backend.services.ollama_client import call_ollama, breaker
 from backend.services.jd_extractor import extract_keywords_llm
-from backend.services.ats_scoring import semantic_score
 from backend.services.resume_rewriter import rewrite_resume_ats
 from backend.services.embeddings_index import EmbeddingsIndex
+from backend.services.hybrid_index import HybridIndex
+from backend.services.prompt_builder import build_analysis_prompt, max_latency_tokens
+from backend.services.structured_analysis import analyze_structured, StructuredOutputError
+from backend.services.coverage import coverage_results
+from backend.services.analysis_inputs import embed_analysis_inputs
+from backend.services.pipeline import StageGraph, StageFailed, DeadlineExceeded
+from backend.services.basic_analysis import keyword_match, section_scores, deterministic_analysis
+from backend.services.job_artifacts import jd_keywords, encode_jd, decode_artifacts, match_postings, pack_vectors
+from backend.services.singleflight import SingleFlight
+from backend.services.executors import run_in, arun
+from .config import Config
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import APIRouter
+from typing import List, Optional
+from concurrent.futures import TimeoutError as FutureTimeout
 import os
+import json
+import time
+import asyncio
+import hashlib
 import logging
+import threading
+from contextlib import contextmanager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,15 +39,99 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def get_db():
+EMPTY_KEYWORDS = {"skills": [], "tools": [], "soft_skills": []}
+
+# identical /analyze requests in flight in this process share one computation
+_analyze_flights = SingleFlight()
+# Idempotency-Keys of /analyze requests in flight: (user, key) -> [request hashes, requests]
+_idempotency_in_flight = {}
+_idempotency_lock = threading.Lock()
+
+def retrieve_context(text: str, jd: str, k: int = 3, embedded: dict = None):
+    """RAG: top resume paragraphs for the JD.
+
+    With ``embedded`` (from embed_analysis_inputs) the already encoded resume
+    chunks are searched instead and nothing is encoded again.
+    """
+    if embedded is not None:
+        paras, vecs, jd_vec = embedded["chunks"], embedded["chunk_vecs"], embedded["jd_vec"]
+    else:
+        paras = [p for p in text.split("\n\n") if p.strip()][:128]
+        vecs = jd_vec = None
+    if not paras:
+        return [text[:1000]]
+    model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    if Config.RAG_RETRIEVAL == "hybrid":
+        emb = HybridIndex(model_name)
+    else:
+        emb = EmbeddingsIndex(model_name=model_name)
+    emb.build(paras, vectors=vecs)
+    return [t for t, sc in emb.query(jd, k=k, q_vec=jd_vec)]
+
+def validate_resume_upload(resume: UploadFile):
+    """Check an uploaded resume's size and type; raises HTTPException"""
+    # Validate file size (10MB limit)
+    MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    resume.file.seek(0, 2)  # Seek to end
+    file_size = resume.file.tell()
+    resume.file.seek(0)  # Reset to beginning
+    
+    if file_size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File size exceeds 10MB limit"
+        )
+    
+    # Validate file type
+    allowed_extensions = ['.pdf', '.docx', '.txt']
+    file_ext = os.path.splitext(resume.filename.lower())[1]
+    if file_ext not in allowed_extensions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
+        )
+
+def resume_upload_sha256(resume: UploadFile) -> str:
+    """Hash of a (validated) upload's bytes, read in chunks"""
+    h = hashlib.sha256()
+    for chunk in iter(lambda: resume.file.read(1 << 16), b""):
+        h.update(chunk)
+    resume.file.seek(0)
+    return h.hexdigest()
+
+def extract_resume_text(resume: UploadFile) -> str:
+    """Text of a validated upload; raises HTTPException. Runs on the parse pool."""
+    try:
+        parsed = parse_upload(resume)
+        if not parsed or len(parsed.strip()) < 50:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unable to extract meaningful text from resume"
+            )
+    except Exception as e:
+        logger.error(f"Error parsing resume: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to parse resume file"
+        )
+    return parsed
+
+async def parse_resume_upload(resume: UploadFile) -> str:
+    """Validate an uploaded resume (size, type) and return its text; raises HTTPException"""
+    validate_resume_upload(resume)
+    return await arun("parse", extract_resume_text, resume)
+
+async def get_db():
+    # async so routes don't take a default-threadpool thread for it; async
+    # routes must only use the session through arun("db", ...)
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await arun("db", db.close)
 
 @router.post("/auth/signup", response_model=schemas.TokenResponse)
-def signup(email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
+async def signup(email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
     """Register a new user with comprehensive error handling"""
     try:
         # Validate email format
@@ -47,15 +149,16 @@ def signup(email: str = Form(...), password: str = Form(...), db: Session = Depe
             )
         
         # Check if user exists
-        existing_user = crud.get_user_by_email(db, email)
+        existing_user = await arun("db", crud.get_user_by_email, db, email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, 
                 detail="Email already registered"
             )
         
-        # Create user
-        user = crud.create_user(db, email, password)
+        # Create user (bcrypt runs on the dedicated auth executor)
+        password_hash = await hash_password_async(password)
+        user = await arun("db", crud.create_user, db, email, password_hash=password_hash)
         token = create_access_token(user.id)
         
         logger.info(f"User created successfully: {email}")
@@ -65,7 +168,7 @@ def signup(email: str = Form(...), password: str = Form(...), db: Session = Depe
         raise
     except SQLAlchemyError as e:
         logger.error(f"Database error during signup: {str(e)}")
-        db.rollback()
+        await arun("db", db.rollback)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database error occurred during signup"
@@ -78,7 +181,7 @@ def signup(email: str = Form(...), password: str = Form(...), db: Session = Depe
         )
 
 @router.post("/auth/login", response_model=schemas.TokenResponse)
-def login(email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
+async def login(email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
     """Authenticate user with comprehensive error handling"""
     try:
         # Validate input
@@ -89,7 +192,7 @@ def login(email: str = Form(...), password: str = Form(...), db: Session = Depen
             )
         
         # Get user
-        user = crud.get_user_by_email(db, email)
+        user = await arun("db", crud.get_user_by_email, db, email)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -97,7 +200,7 @@ def login(email: str = Form(...), password: str = Form(...), db: Session = Depen
             )
         
         # Verify password
-        if not verify_password(password, user.password_hash):
+        if not await verify_password_async(password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
@@ -117,14 +220,74 @@ def login(email: str = Form(...), password: str = Form(...), db: Session = Depen
             detail="An unexpected error occurred during login"
         )
 
+@contextmanager
+def claim_idempotency_key(user_id: int, key: Optional[str], request_hashes: tuple):
+    """Hold an Idempotency-Key while its request runs; 409 if it's in use by a different request.
+
+    Until the analysis row is saved, only this map knows the key is taken.
+    """
+    if not key:
+        yield
+        return
+    slot = (user_id, key)
+    with _idempotency_lock:
+        entry = _idempotency_in_flight.setdefault(slot, [request_hashes, 0])
+        conflict = entry[0] != request_hashes
+        if not conflict:
+            entry[1] += 1
+    if conflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Idempotency-Key is in use by a different request"
+        )
+    try:
+        yield
+    finally:
+        with _idempotency_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _idempotency_in_flight[slot]
+
+def analysis_deadline(x_request_deadline: Optional[float]) -> float:
+    """time.monotonic() by which /analyze must answer: ANALYZE_DEADLINE_S, or a shorter X-Request-Deadline"""
+    budget = Config.ANALYZE_DEADLINE_S
+    if x_request_deadline is not None and x_request_deadline > 0:
+        budget = min(budget, x_request_deadline)
+    return time.monotonic() + budget
+
+def analysis_model_key() -> str:
+    """Models an analysis result depends on; part of the reuse key"""
+    return f"{Config.OLLAMA_MODEL}|{Config.EMBEDDING_MODEL}|{Config.ANALYZE_MODE}"
+
+def stored_result(a: models.Analysis) -> dict:
+    result = json.loads(a.result_json)
+    result.update(resume_id=a.resume_id, analysis_id=a.id, reused=True)
+    return result
+
 @router.post("/analyze")
-def analyze(
+async def analyze(
     resume: UploadFile = File(...), 
     jd: str = Form(...), 
     db: Session = Depends(get_db), 
-    user_id: int = Depends(get_current_user)
+    user_id: int = Depends(get_current_user),
+    x_request_deadline: Optional[float] = Header(None),
+    idempotency_key: Optional[str] = Header(None)
 ):
-    """Analyze resume against job description with comprehensive error handling"""
+    """Analyze resume against job description with comprehensive error handling.
+
+    The request must finish within ANALYZE_DEADLINE_S, or within the
+    X-Request-Deadline header (seconds) if that is shorter. When the budget
+    left can't cover an LLM call, or the LLM fails, a deterministic analysis
+    is returned with "degraded": true; POST /analyze/{analysis_id}/narrative
+    adds the LLM narrative later.
+
+    A request carrying an Idempotency-Key that was already served returns
+    the stored result, as does any request for the same resume file, JD and
+    models within ANALYZE_REUSE_MAX_AGE_S; concurrent identical requests
+    wait for the one in flight. Reused results have "reused": true.
+    """
+    # the budget covers the whole request: hashing, queueing and parsing too
+    deadline_at = analysis_deadline(x_request_deadline)
     try:
         # Validate inputs
         if not resume:
@@ -139,122 +302,573 @@ def analyze(
                 detail="Job description must be at least 10 characters"
             )
         
-        # Validate file size (10MB limit)
-        MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-        resume.file.seek(0, 2)  # Seek to end
-        file_size = resume.file.tell()
-        resume.file.seek(0)  # Reset to beginning
+        validate_resume_upload(resume)
+        resume_sha = await arun("parse", resume_upload_sha256, resume)
+        jd_sha = crud.jd_hash(jd)
+        model = analysis_model_key()
         
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="File size exceeds 10MB limit"
-            )
+        def stored_analysis():
+            """Stored result to replay or reuse, else None"""
+            if idempotency_key:
+                prior = crud.get_analysis_by_idempotency_key(db, user_id, idempotency_key, Config.IDEMPOTENCY_TTL_S)
+                if prior:
+                    if prior.resume.content_sha256 != resume_sha or prior.job_description.sha256 != jd_sha:
+                        raise HTTPException(
+                            status_code=status.HTTP_409_CONFLICT,
+                            detail="Idempotency-Key was already used for a different request"
+                        )
+                    if prior.result_json:
+                        logger.info(f"Replaying analysis {prior.id} for Idempotency-Key")
+                        return stored_result(prior)
+            
+            if Config.ANALYZE_REUSE_MAX_AGE_S > 0:
+                prior = crud.find_reusable_analysis(db, user_id, resume_sha, jd_sha, model, Config.ANALYZE_REUSE_MAX_AGE_S)
+                if prior:
+                    logger.info(f"Reusing analysis {prior.id} for resume {prior.resume_id}")
+                    return stored_result(prior)
+            return None
         
-        # Validate file type
-        allowed_extensions = ['.pdf', '.docx', '.txt']
-        file_ext = os.path.splitext(resume.filename.lower())[1]
-        if file_ext not in allowed_extensions:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
-            )
+        def compute():
+            # own session: the computation may outlive this request (it is
+            # shared with identical requests and isn't cancelled with it)
+            run_db = SessionLocal()
+            try:
+                return run_analysis(resume, jd, run_db, user_id, deadline_at, resume_sha, model, idempotency_key)
+            finally:
+                run_db.close()
         
-        # Parse resume
-        try:
-            parsed = parse_upload(resume)
-            if not parsed or len(parsed.strip()) < 50:
+        # held from the stored-key check until the result is saved, so a
+        # concurrent request reusing the key for another payload gets a 409
+        with claim_idempotency_key(user_id, idempotency_key, (resume_sha, jd_sha)):
+            stored = await arun("db", stored_analysis)
+            if stored is not None:
+                return stored
+            
+            # the run (and waiting for an identical one) happens on the
+            # request pool; it only waits on the stage pools, never on its own.
+            # A request joining a run in flight waits only for its own deadline.
+            try:
+                result, shared = await arun(
+                    "request", _analyze_flights.do,
+                    (user_id, resume_sha, jd_sha, model), compute, timeout=max(deadline_at - time.monotonic(), 0)
+                )
+            except FutureTimeout:
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Unable to extract meaningful text from resume"
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="Analysis took too long, please try again"
                 )
-        except Exception as e:
-            logger.error(f"Error parsing resume: {str(e)}")
+            if not shared:
+                return result
+            if idempotency_key and result.get("analysis_id") is not None:
+                # only the owner's key was saved with the analysis: a retry with this key replays it too
+                try:
+                    await arun("db", crud.add_analysis_key, db, user_id, idempotency_key, result["analysis_id"])
+                except SQLAlchemyError as e:
+                    logger.error(f"Database error saving Idempotency-Key: {str(e)}")
+                    await arun("db", db.rollback)
+            return dict(result, reused=True)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during analysis: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred during analysis"
+        )
+
+def run_analysis(resume: UploadFile, jd: str, db: Session, user_id: int, deadline_at: float,
+                 resume_sha: str, model: str, idempotency_key: Optional[str] = None) -> dict:
+    """Parse, score and analyze one resume (the uncached /analyze path) by deadline_at (time.monotonic())"""
+    try:
+        try:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise FutureTimeout()
+            parsed = run_in("parse", extract_resume_text, resume, wait_timeout=remaining)
+        except FutureTimeout:
+            logger.error("Analysis deadline exceeded before the resume was parsed")
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to parse resume file"
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Analysis took too long, please try again"
             )
         
-        # Save resume to database
+        # Independent stages run concurrently: end-to-end latency is the
+        # slowest branch instead of the sum of all of them.
+        def save_resume_stage():
+            # Own session: on a deadline the handler returns (and get_db closes
+            # its session) while this stage may still be committing
+            stage_db = SessionLocal()
+            try:
+                return crud.save_resume(stage_db, user_id, resume.filename, parsed, content_sha256=resume_sha).id
+            except SQLAlchemyError as e:
+                logger.error(f"Database error saving resume: {str(e)}")
+                stage_db.rollback()
+                raise
+            finally:
+                stage_db.close()
+        
+        # the resume is encoded once (with the JD, its requirements and the
+        # resume sections); the stages below share those vectors
+        def embed_stage():
+            return embed_analysis_inputs(parsed, jd)
+        
+        def score_stage(embedded):
+            if embedded is None:
+                raise RuntimeError("resume was not encoded")
+            return round(float(embedded["resume_vec"] @ embedded["jd_vec"]) * 100, 2)
+        
+        def coverage_stage(embedded):
+            if embedded is None:
+                raise RuntimeError("resume was not encoded")
+            return coverage_results(embedded["requirements"], embedded["req_vecs"],
+                                    [embedded["chunks"]], embedded["chunk_vecs"])[0]
+        
+        def context_stage(embedded):
+            return retrieve_context(parsed, jd, embedded=embedded)
+        
+        def sections_stage(embedded):
+            if embedded is None:
+                raise RuntimeError("resume was not encoded")
+            return section_scores(embedded["sections"], embedded["section_vecs"], embedded["jd_vec"])
+        
+        def llm_budget():
+            """Timeout for the next LLM call, or None when the deadline can't cover one"""
+            remaining = graph.remaining()
+            if graph.cancelled.is_set() or (remaining is not None and remaining < Config.LLM_MIN_BUDGET_S):
+                return None
+            return remaining or Config.OLLAMA_TIMEOUT
+        
+        def keywords_stage():
+            timeout = llm_budget()
+            if timeout is None:
+                return EMPTY_KEYWORDS
+            return extract_keywords_llm(jd, timeout=timeout, cancel=graph.cancelled)
+        
+        def narrative(context_chunks):
+            # Generate analysis with LLM (prompt capped to the analyze token budget)
+            timeout = llm_budget()
+            if timeout is None:
+                return None
+            prompt, prompt_tokens = build_analysis_prompt(context_chunks, jd)
+            logger.info(f"Analysis prompt ~{prompt_tokens} tokens (worst case {max_latency_tokens(prompt_tokens)})")
+            try:
+                analysis = call_ollama(prompt, timeout=timeout, max_retries=1, cancel=graph.cancelled)
+            except Exception as e:
+                logger.error(f"Error calling Ollama: {str(e)}")
+                return None
+            return {"analysis": analysis, "gaps": [], "prompt_tokens": prompt_tokens}
+        
+        def llm_stage(context_chunks, jd_keywords=None):
+            # None means no usable LLM output: the response is degraded
+            if Config.ANALYZE_MODE == "single":
+                # Single structured LLM call: keywords + gaps + narrative together
+                timeout = llm_budget()
+                if timeout is None:
+                    logger.warning("Deadline can't cover an LLM call, returning a degraded analysis")
+                    return None
+                try:
+                    structured = analyze_structured(context_chunks, jd, timeout=timeout, cancel=graph.cancelled)
+                    return {
+                        "keywords": structured["keywords"],
+                        "gaps": structured["gaps"],
+                        "analysis": structured["narrative"],
+                        "prompt_tokens": structured["prompt_tokens"],
+                    }
+                except StructuredOutputError as e:
+                    logger.warning(f"Structured analysis failed, using two-call path: {str(e)}")
+                    timeout = llm_budget()
+                    if timeout is None:
+                        return None
+                    try:
+                        jd_keywords = extract_keywords_llm(jd, timeout=timeout, cancel=graph.cancelled)
+                    except Exception as kw_error:
+                        logger.warning(f"Error extracting keywords: {str(kw_error)}")
+                        jd_keywords = EMPTY_KEYWORDS
+                except Exception as e:
+                    # LLM down, missing or crashed model: more calls won't help
+                    logger.warning(f"LLM unavailable, returning a degraded analysis: {str(e)}")
+                    return None
+            out = narrative(context_chunks)
+            if out is not None:
+                out["keywords"] = jd_keywords
+            return out
+        
+        graph = StageGraph(deadline_at=deadline_at)
+        # each stage runs on the pool for its kind of work, so e.g. a burst of
+        # slow LLM calls can't hold the threads that encoding needs
+        graph.add("resume", save_resume_stage, pool="db")
+        graph.add("embed", embed_stage, critical=False, default=None, pool="cpu")
+        graph.add("score", score_stage, deps=["embed"], critical=False, default=0.0, pool="cpu")
+        graph.add("context", context_stage, deps=["embed"], critical=False, default=[parsed[:1000]], pool="cpu")
+        graph.add("coverage", coverage_stage, deps=["embed"], critical=False, default=None, pool="cpu")
+        graph.add("sections", sections_stage, deps=["embed"], critical=False, default=[], pool="cpu")
+        if Config.ANALYZE_MODE == "single":
+            graph.add("llm", llm_stage, deps=["context"], critical=False, default=None, pool="llm")
+        else:
+            # keyword extraction overlaps with chunking and encoding
+            graph.add("keywords", keywords_stage, critical=False, default=EMPTY_KEYWORDS, pool="llm")
+            graph.add("llm", llm_stage, deps=["context", "keywords"], critical=False, default=None, pool="llm")
+        
         try:
-            r = crud.save_resume(db, user_id, resume.filename, parsed)
-        except SQLAlchemyError as e:
-            logger.error(f"Database error saving resume: {str(e)}")
-            db.rollback()
+            results = graph.run()
+        except DeadlineExceeded as e:
+            logger.error(f"Analysis deadline exceeded: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Analysis took too long, please try again"
+            )
+        except StageFailed as e:
+            logger.error(f"Analysis stage failed: {str(e)}")
+            detail = "Failed to save resume" if e.stage == "resume" else "An unexpected error occurred during analysis"
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to save resume"
+                detail=detail
             )
         
-        # Extract keywords with fallback
-        try:
-            jd_keywords = extract_keywords_llm(jd)
-            matched = [k for k in jd_keywords.get("skills", []) if k.lower() in parsed.lower()]
-        except Exception as e:
-            logger.warning(f"Error extracting keywords: {str(e)}")
-            matched = []
-            jd_keywords = {"skills": [], "tools": [], "soft_skills": []}
+        resume_id = results["resume"]
+        score = results["score"]
+        llm = results["llm"]
+        degraded = llm is None
+        if degraded:
+            # keywords may still come from the two-call path's keyword stage
+            matched, missing = keyword_match(parsed, jd, results.get("keywords"))
+            basic = deterministic_analysis(score, results["coverage"], results["sections"], missing)
+            analysis = basic["analysis"]
+            gaps = basic["gaps"]
+            prompt_tokens = None
+        else:
+            analysis = llm["analysis"]
+            gaps = llm["gaps"]
+            prompt_tokens = llm["prompt_tokens"]
+            matched = [k for k in llm["keywords"].get("skills", []) if k.lower() in parsed.lower()]
+            _, missing = keyword_match(parsed, jd, llm["keywords"])
         
-        # Calculate semantic score
-        try:
-            score = semantic_score(parsed, jd)
-        except Exception as e:
-            logger.warning(f"Error calculating semantic score: {str(e)}")
-            score = 0.0
+        result = {
+            "score": score, 
+            "matched_keywords": matched, 
+            "missing_keywords": missing,
+            "analysis": analysis,
+            "gaps": gaps,
+            "coverage": results["coverage"],
+            "section_scores": results["sections"],
+            "prompt_tokens": prompt_tokens,
+            "degraded": degraded,
+            "reused": False
+        }
         
-        # RAG: fetch top context from resume paragraphs
+        a = None
+        # Save analysis (with its result, for reuse and idempotent replays)
         try:
-            paras = [p for p in parsed.split("\n\n") if p.strip()]
-            emb = EmbeddingsIndex(model_name=os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
-            
-            if paras:
-                emb.build(paras[:128])
-                top = emb.query(jd, k=3)
-                context_text = "\n\n".join(t for t, sc in top)
-            else:
-                context_text = parsed[:1000]
-        except Exception as e:
-            logger.warning(f"Error building embeddings index: {str(e)}")
-            context_text = parsed[:1000]
+            a = crud.save_analysis(db, resume_id, jd, score, matched, analysis, degraded=degraded, model=model,
+                                   idempotency_key=idempotency_key, result=result)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error saving analysis: {str(e)}")
+            db.rollback()
+            # Continue even if save fails
         
-        # Generate analysis with LLM
-        try:
-            prompt = (
-                "You are an ATS resume evaluator. Using the context and job description, provide concise analysis.\n\n"
-                f"Context:\n{context_text}\n\nJob Description:\n{jd}\n"
+        logger.info(f"Analysis completed for resume {resume_id}, score: {score}, degraded: {degraded}")
+        return dict(result, resume_id=resume_id, analysis_id=a.id if a is not None else None)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during analysis: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred during analysis"
+        )
+
+@router.post("/analyze/{analysis_id}/narrative", response_model=schemas.NarrativeResponse)
+async def upgrade_narrative(
+    analysis_id: int,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """Add the LLM narrative to a (degraded) analysis, without the /analyze deadline.
+
+    Each LLM call gets OLLAMA_TIMEOUT, including the wait for the llm pool.
+    """
+    def load():
+        a = crud.get_analysis(db, analysis_id)
+        if not a or not a.resume or a.resume.user_id != user_id:
+            return None
+        return a, a.resume_id, a.resume.text, a.jd, a.matched_keywords
+    
+    try:
+        loaded = await arun("db", load)
+        if loaded is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Analysis not found"
             )
-            analysis = call_ollama(prompt)
+        a, resume_id, text, jd, matched_keywords = loaded
+        
+        context_chunks = await arun("cpu", retrieve_context, text, jd)
+        llm_timeout = Config.OLLAMA_TIMEOUT
+        try:
+            structured = await arun("llm", analyze_structured, context_chunks, jd,
+                                    timeout=llm_timeout, wait_timeout=llm_timeout)
+            analysis = structured["narrative"]
+            gaps = structured["gaps"]
+            prompt_tokens = structured["prompt_tokens"]
+            matched = [k for k in structured["keywords"].get("skills", []) if k.lower() in text.lower()]
+        except StructuredOutputError as e:
+            logger.warning(f"Structured analysis failed, generating narrative only: {str(e)}")
+            prompt, prompt_tokens = build_analysis_prompt(context_chunks, jd)
+            try:
+                analysis = await arun("llm", call_ollama, prompt, timeout=llm_timeout, max_retries=1,
+                                      wait_timeout=llm_timeout)
+            except Exception as llm_error:
+                logger.error(f"Error calling Ollama: {str(llm_error)}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="LLM service unavailable, please try again later"
+                )
+            gaps = []
+            matched = [k for k in (matched_keywords or "").split(",") if k]
         except Exception as e:
-            logger.error(f"Error calling Ollama: {str(e)}")
-            analysis = "LLM service unavailable. Basic analysis: Score calculated based on semantic similarity."
+            logger.error(f"LLM unavailable for narrative upgrade: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="LLM service unavailable, please try again later"
+            )
         
-        # Save analysis
         try:
-            a = crud.save_analysis(db, r.id, jd, score, matched, analysis)
+            await arun("db", crud.update_analysis, db, a, analysis, matched, gaps)
         except SQLAlchemyError as e:
-            logger.error(f"Database error saving analysis: {str(e)}")
-            db.rollback()
-            # Continue even if save fails
+            logger.error(f"Database error updating analysis: {str(e)}")
+            await arun("db", db.rollback)
         
-        logger.info(f"Analysis completed for resume {r.id}, score: {score}")
         return {
-            "resume_id": r.id, 
-            "score": score, 
-            "matched_keywords": matched, 
-            "analysis": analysis
+            "analysis_id": analysis_id,
+            "resume_id": resume_id,
+            "analysis": analysis,
+            "matched_keywords": matched,
+            "gaps": gaps,
+            "prompt_tokens": prompt_tokens,
+            "degraded": False
         }
-        
+    
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error during analysis: {str(e)}")
+        logger.error(f"Unexpected error upgrading analysis: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred during analysis"
         )
 
+async def build_jd_artifacts(jd_id: int):
+    """Background task: compute a JD's keywords, requirements and embeddings once.
+
+    Async so it holds no default-threadpool thread: the keywords wait on the
+    llm pool while the encode runs on the cpu pool, the session is only used
+    on the db pool.
+    """
+    db = SessionLocal()
+    
+    def load():
+        jd_row = db.get(models.JobDescription, jd_id)
+        if jd_row is None:
+            return None
+        return jd_row, crud.artifacts_status_for(jd_row), jd_row.text
+    
+    try:
+        loaded = await arun("db", load)
+        if loaded is None:
+            return
+        jd_row, artifacts_status, text = loaded
+        if artifacts_status != "ready":
+            # don't wait out an Ollama outage
+            keywords, art = await asyncio.gather(
+                arun("llm", jd_keywords, text, use_llm=breaker.state == "closed",
+                     llm_timeout=Config.ARTIFACTS_LLM_TIMEOUT_S),
+                arun("cpu", encode_jd, text),
+            )
+            await arun("db", crud.save_jd_artifacts, db, jd_row, keywords, art["requirements"],
+                       pack_vectors(art["jd_vec"]), pack_vectors(art["req_vecs"]), art["model"])
+            logger.info(f"Artifacts computed for JD {jd_id} ({len(art['requirements'])} requirements)")
+        await arun("db", crud.set_artifacts_status, db, jd_id, "ready")
+    except Exception as e:
+        logger.error(f"Error computing artifacts for JD {jd_id}: {str(e)}")
+        await arun("db", db.rollback)
+        try:
+            await arun("db", crud.set_artifacts_status, db, jd_id, "failed")
+        except SQLAlchemyError:
+            await arun("db", db.rollback)
+    finally:
+        await arun("db", db.close)
+
+def posting_dict(p: models.JobPosting) -> dict:
+    return {
+        "id": p.id,
+        "title": p.title,
+        "company": p.company,
+        "jd": p.job_description.text,
+        "status": p.status,
+        "artifacts_status": p.artifacts_status,
+        "owner_id": p.owner_id,
+        "created_at": p.created_at,
+        "updated_at": p.updated_at,
+    }
+
+def get_owned_posting(db: Session, posting_id: int, user_id: int) -> models.JobPosting:
+    p = crud.get_posting(db, posting_id)
+    if not p or p.owner_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job posting not found"
+        )
+    return p
+
+@router.post("/postings", response_model=schemas.JobPostingOut)
+async def create_posting(
+    background_tasks: BackgroundTasks,
+    title: str = Form(...),
+    jd: str = Form(...),
+    company: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """Create a job posting; its JD artifacts are computed in the background"""
+    if not title.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Title is required")
+    if not jd or len(jd.strip()) < 10:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Job description must be at least 10 characters"
+        )
+    def create():
+        p = crud.create_posting(db, user_id, title.strip(), jd, company)
+        return posting_dict(p), p.jd_id
+    
+    try:
+        out, jd_id = await arun("db", create)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error creating posting: {str(e)}")
+        await arun("db", db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create job posting"
+        )
+    if out["artifacts_status"] != "ready":
+        background_tasks.add_task(build_jd_artifacts, jd_id)
+    logger.info(f"Job posting {out['id']} created by user {user_id}")
+    return out
+
+@router.get("/postings", response_model=List[schemas.JobPostingOut])
+async def list_postings(
+    status_filter: Optional[str] = Query("open", alias="status"),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """List job postings: open ones by default; ?status=all adds your own closed postings"""
+    status_filter = None if status_filter == "all" else status_filter
+    
+    def load():
+        return [posting_dict(p) for p in crud.list_postings(db, status_filter, owner_id=user_id)]
+    
+    return await arun("db", load)
+
+@router.get("/postings/{posting_id}", response_model=schemas.JobPostingOut)
+async def get_posting(posting_id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user)):
+    def load():
+        p = crud.get_posting(db, posting_id)
+        if not p or (p.status != "open" and p.owner_id != user_id):
+            return None
+        return posting_dict(p)
+    
+    out = await arun("db", load)
+    if out is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job posting not found")
+    return out
+
+@router.put("/postings/{posting_id}", response_model=schemas.JobPostingOut)
+async def update_posting(
+    posting_id: int,
+    background_tasks: BackgroundTasks,
+    title: Optional[str] = Form(None),
+    jd: Optional[str] = Form(None),
+    company: Optional[str] = Form(None),
+    posting_status: Optional[str] = Form(None, alias="status"),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """Update a posting you own; a changed JD gets its artifacts recomputed"""
+    p = await arun("db", get_owned_posting, db, posting_id, user_id)
+    if posting_status is not None and posting_status not in ("open", "closed"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Status must be open or closed")
+    if jd is not None and len(jd.strip()) < 10:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Job description must be at least 10 characters"
+        )
+    def update():
+        updated = crud.update_posting(db, p, title=title, company=company, jd=jd, status=posting_status)
+        return posting_dict(updated), updated.jd_id
+    
+    try:
+        out, jd_id = await arun("db", update)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error updating posting: {str(e)}")
+        await arun("db", db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update job posting"
+        )
+    if out["artifacts_status"] != "ready":
+        background_tasks.add_task(build_jd_artifacts, jd_id)
+    return out
+
+@router.delete("/postings/{posting_id}")
+async def delete_posting(posting_id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user)):
+    p = await arun("db", get_owned_posting, db, posting_id, user_id)
+    try:
+        await arun("db", crud.delete_posting, db, p)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error deleting posting: {str(e)}")
+        await arun("db", db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete job posting"
+        )
+    return {"deleted": posting_id}
+
+@router.post("/match", response_model=schemas.MatchResponse)
+async def match(
+    resume: UploadFile = File(...),
+    limit: int = Form(20),
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """Score one resume against every open job posting using precomputed JD artifacts"""
+    try:
+        parsed = await parse_resume_upload(resume)
+        
+        def load_postings():
+            return [
+                {"id": p.id, "title": p.title, "company": p.company,
+                 "artifacts": decode_artifacts(p.jd_id, p.job_description)}
+                for p in crud.matchable_postings(db)
+            ]
+        
+        postings = await arun("db", load_postings)
+        results = await arun("cpu", match_postings, parsed, postings)
+        logger.info(f"Matched resume against {len(postings)} postings for user {user_id}")
+        return {"postings_scored": len(postings), "matches": results[:max(limit, 1)]}
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during match: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred during matching"
+        )
+
 @router.post("/rewrite")
-def rewrite(
+async def rewrite(
     resume_text: str = Form(...), 
     jd: str = Form(...), 
     user_id: int = Depends(get_current_user)
@@ -276,7 +890,8 @@ def rewrite(
         
         # Rewrite resume
         try:
-            out = rewrite_resume_ats(resume_text, jd)
+            # waits on the llm pool, so it runs on the request pool
+            out = await arun("request", rewrite_resume_ats, resume_text, jd)
             logger.info(f"Resume rewritten successfully for user {user_id}")
             return out
         except Exception as e:
@@ -1,8 +1,12 @@
 from passlib.context import CryptContext
 import jwt
+import hashlib
+import time
 from datetime import datetime, timedelta
 from fastapi import HTTPException, Header
 from .config import Config
+from backend.services.cache import LRUCache
+from backend.services.executors import arun
 
 
 pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -10,26 +14,47 @@ JWT_SECRET = Config.JWT_SECRET
 ALGO = "HS256"
 ACCESS_EXPIRE_MINUTES = 60*24*7
 
+# sha256(token) -> user_id, expiring at min(token exp, now + TTL)
+_token_cache = LRUCache(Config.TOKEN_CACHE_SIZE)
+
 def hash_password(password: str) -> str:
     return pwd_ctx.hash(password)
 
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_ctx.verify(plain, hashed)
 
+# bcrypt runs on its own small "auth" pool so a login burst can't occupy the
+# threads that analysis work runs on
+async def hash_password_async(password: str) -> str:
+    return await arun("auth", hash_password, password)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await arun("auth", verify_password, plain, hashed)
+
 def create_access_token(subject: int) -> str:
     payload = {"sub": str(subject), "exp": datetime.utcnow() + timedelta(minutes=ACCESS_EXPIRE_MINUTES)}
     return jwt.encode(payload, JWT_SECRET, algorithm=ALGO)
 
 def decode_token(token: str) -> int:
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    user_id = _token_cache.get(key)
+    if user_id is not None:
+        return user_id
     try:
         data = jwt.decode(token, JWT_SECRET, algorithms=[ALGO])
-        return int(data.get("sub"))
+        user_id = int(data.get("sub"))
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
+    expires_at = time.time() + Config.TOKEN_CACHE_TTL
+    if data.get("exp"):
+        expires_at = min(expires_at, float(data["exp"]))
+    _token_cache.put(key, user_id, expires_at)
+    return user_id
 
-def get_current_user(authorization: str = Header(None)):
+async def get_current_user(authorization: str = Header(None)):
+    # async: a (cached) token decode doesn't need a threadpool thread
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header missing")
     try:
@@ -26,10 +26,87 @@ class Config:
     ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
 
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ats.db")
+    TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "zlib")  # zlib, zstd (needs zstandard) or none
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "256"))  # shorter texts are stored raw
     JWT_SECRET = os.getenv("JWT_SECRET", "ruhul_204085_amin")
+    AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))  # concurrent bcrypt operations
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))  # seconds
     OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
     OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "600"))
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "2"))  # in-flight Ollama calls per worker
+    OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+    OLLAMA_NUM_PREDICT = int(os.getenv("OLLAMA_NUM_PREDICT", "400"))
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # how long Ollama keeps the model loaded
+    OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"
+
+    # Circuit breaker: after N consecutive failures skip Ollama for RESET_S,
+    # then a cheap probe decides whether to let a real call through
+    OLLAMA_BREAKER_FAILURES = int(os.getenv("OLLAMA_BREAKER_FAILURES", "3"))
+    OLLAMA_BREAKER_RESET_S = float(os.getenv("OLLAMA_BREAKER_RESET_S", "30"))
+    OLLAMA_PROBE_TIMEOUT = float(os.getenv("OLLAMA_PROBE_TIMEOUT", "2"))
+
+    # "two_call": keyword extraction and narrative as separate LLM calls;
+    # "single": one structured call returns keywords + gaps + narrative,
+    # falling back to the two-call path if its output is invalid
+    ANALYZE_MODE = os.getenv("ANALYZE_MODE", "two_call")
+    ANALYZE_NUM_PREDICT = int(os.getenv("ANALYZE_NUM_PREDICT", "800"))
+
+    # Concurrent analyze pipeline
+    PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "8"))
+
+    # Separate pools per kind of blocking work (see services/executors.py)
+    EXECUTOR_CPU_WORKERS = int(os.getenv("EXECUTOR_CPU_WORKERS", "2"))
+    EXECUTOR_PARSE_WORKERS = int(os.getenv("EXECUTOR_PARSE_WORKERS", "4"))
+    EXECUTOR_DB_WORKERS = int(os.getenv("EXECUTOR_DB_WORKERS", "8"))
+    EXECUTOR_LLM_WORKERS = int(os.getenv("EXECUTOR_LLM_WORKERS", "8"))
+    EXECUTOR_REQUEST_WORKERS = int(os.getenv("EXECUTOR_REQUEST_WORKERS", "16"))
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))  # uvicorn worker processes
+    TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))  # 0 = cores / (workers x cpu pool)
+    ANALYZE_DEADLINE_S = float(os.getenv("ANALYZE_DEADLINE_S", "300"))
+    # Below this much remaining budget the LLM is skipped and a deterministic
+    # (degraded) analysis is returned instead
+    LLM_MIN_BUDGET_S = float(os.getenv("LLM_MIN_BUDGET_S", "20"))
+    # Job posting artifacts are built in a background task: one LLM attempt
+    # this long at most, then JD terms are used as keywords
+    ARTIFACTS_LLM_TIMEOUT_S = float(os.getenv("ARTIFACTS_LLM_TIMEOUT_S", "60"))
+    # Reuse a stored analysis of the same resume file + JD + models younger than
+    # this (0 disables); Idempotency-Key replays are honoured for IDEMPOTENCY_TTL_S
+    ANALYZE_REUSE_MAX_AGE_S = float(os.getenv("ANALYZE_REUSE_MAX_AGE_S", "3600"))
+    IDEMPOTENCY_TTL_S = float(os.getenv("IDEMPOTENCY_TTL_S", "86400"))
+
+    # Resume rewrite: "sections" (parallel per-section) or "whole"
+    REWRITE_MODE = os.getenv("REWRITE_MODE", "sections")
+    REWRITE_CACHE_SIZE = int(os.getenv("REWRITE_CACHE_SIZE", "512"))
+    # Max generated tokens per rewrite unit; the output is about as long as the input
+    REWRITE_NUM_PREDICT_SUMMARY = int(os.getenv("REWRITE_NUM_PREDICT_SUMMARY", "300"))
+    REWRITE_NUM_PREDICT_JOB = int(os.getenv("REWRITE_NUM_PREDICT_JOB", "700"))
+    REWRITE_NUM_PREDICT_SKILLS = int(os.getenv("REWRITE_NUM_PREDICT_SKILLS", "250"))
+    REWRITE_NUM_PREDICT_WHOLE = int(os.getenv("REWRITE_NUM_PREDICT_WHOLE", "1500"))
+
+    # Prompt token budgets per endpoint (prompt only, generation excluded)
+    PROMPT_BUDGET_ANALYZE = int(os.getenv("PROMPT_BUDGET_ANALYZE", "1536"))
+    PROMPT_BUDGET_REWRITE = int(os.getenv("PROMPT_BUDGET_REWRITE", "3072"))
+
+    # Shared embedding server (unset = each worker loads its own model)
+    EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "")
+    EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+    EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+
+    # Defaults for MmapVectorStore (services/vector_store.py)
+    VECTOR_STORE_DTYPE = os.getenv("VECTOR_STORE_DTYPE", "float16")  # or "float32"
+    VECTOR_STORE_SEGMENT_ROWS = int(os.getenv("VECTOR_STORE_SEGMENT_ROWS", "1000000"))
+
+    # Requirement coverage: cosine below LOW earns nothing, at/above HIGH counts as covered
+    COVERAGE_LOW = float(os.getenv("COVERAGE_LOW", "0.2"))
+    COVERAGE_HIGH = float(os.getenv("COVERAGE_HIGH", "0.6"))
+
+    # RAG retrieval: "hybrid" (BM25 prefilter + dense rerank) or "dense"
+    RAG_RETRIEVAL = os.getenv("RAG_RETRIEVAL", "hybrid")
+    HYBRID_PREFILTER_K = int(os.getenv("HYBRID_PREFILTER_K", "32"))
+    HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.7"))  # weight of dense score
+    HYBRID_FUSION = os.getenv("HYBRID_FUSION", "weighted")  # "weighted" or "rrf"
 
     @staticmethod
     def allowed_file(filename):
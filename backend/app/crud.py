@@ -1,9 +1,15 @@
-from sqlalchemy.orm import Session
+import hashlib
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, contains_eager, selectinload
+from sqlalchemy.exc import IntegrityError
 from . import models
 from .auth import hash_password
+from .config import Config
 
-def create_user(db: Session, email: str, password: str):
-    user = models.User(email=email, password_hash=hash_password(password))
+def create_user(db: Session, email: str, password: str = None, password_hash: str = None):
+    user = models.User(email=email, password_hash=password_hash or hash_password(password))
     db.add(user)
     db.commit()
     db.refresh(user)
@@ -12,16 +18,186 @@ def create_user(db: Session, email: str, password: str):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def save_resume(db: Session, user_id: int, filename: str, text: str):
-    r = models.Resume(user_id=user_id, filename=filename, text=text)
+def save_resume(db: Session, user_id: int, filename: str, text: str, content_sha256: str = None):
+    r = models.Resume(user_id=user_id, filename=filename, text=text, content_sha256=content_sha256)
     db.add(r)
     db.commit()
     db.refresh(r)
     return r
 
-def save_analysis(db: Session, resume_id: int, jd: str, score: float, matched_keywords: list, analysis_text: str):
-    a = models.Analysis(resume_id=resume_id, jd=jd, score=score, matched_keywords=",".join(matched_keywords), analysis_text=analysis_text)
+def jd_hash(text: str) -> str:
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+def get_or_create_jd(db: Session, text: str):
+    """The JobDescription row for this text, inserted on first use"""
+    sha = jd_hash(text)
+    jd = db.query(models.JobDescription).filter(models.JobDescription.sha256 == sha).first()
+    if jd:
+        return jd
+    jd = models.JobDescription(sha256=sha, text=text.strip())
+    db.add(jd)
+    try:
+        db.commit()
+    except IntegrityError:
+        # another request stored the same JD first
+        db.rollback()
+        return db.query(models.JobDescription).filter(models.JobDescription.sha256 == sha).one()
+    db.refresh(jd)
+    return jd
+
+def save_analysis(db: Session, resume_id: int, jd: str, score: float, matched_keywords: list, analysis_text: str,
+                  degraded: bool = False, model: str = None, idempotency_key: str = None, result: dict = None):
+    jd_row = get_or_create_jd(db, jd)
+    a = models.Analysis(resume_id=resume_id, jd_id=jd_row.id, score=score, matched_keywords=",".join(matched_keywords), analysis_text=analysis_text,
+                        degraded=degraded, model=model, idempotency_key=idempotency_key,
+                        result_json=json.dumps(result, default=str) if result is not None else None)
     db.add(a)
     db.commit()
     db.refresh(a)
     return a
+
+def get_analysis(db: Session, analysis_id: int):
+    return db.query(models.Analysis).filter(models.Analysis.id == analysis_id).first()
+
+def update_analysis(db: Session, a: models.Analysis, analysis_text: str, matched_keywords: list = None, gaps: list = None):
+    a.analysis_text = analysis_text
+    if matched_keywords is not None:
+        a.matched_keywords = ",".join(matched_keywords)
+    a.degraded = False
+    if a.result_json:
+        # keep the stored /analyze result (served on reuse) in step
+        result = json.loads(a.result_json)
+        result.update(analysis=analysis_text, degraded=False)
+        if matched_keywords is not None:
+            result["matched_keywords"] = matched_keywords
+        if gaps:
+            result["gaps"] = gaps
+        a.result_json = json.dumps(result, default=str)
+    db.commit()
+    db.refresh(a)
+    return a
+
+def _recent_user_analyses(db: Session, user_id: int, max_age_s: float):
+    since = datetime.utcnow() - timedelta(seconds=max_age_s)
+    return (
+        db.query(models.Analysis)
+        .join(models.Analysis.resume)
+        .filter(models.Resume.user_id == user_id, models.Analysis.created_at >= since)
+    )
+
+def get_analysis_by_idempotency_key(db: Session, user_id: int, key: str, max_age_s: float):
+    """The analysis saved with key, or the one a request with key shared (add_analysis_key)"""
+    a = (
+        _recent_user_analyses(db, user_id, max_age_s)
+        .filter(models.Analysis.idempotency_key == key)
+        .order_by(models.Analysis.id.desc())
+        .first()
+    )
+    if a is not None:
+        return a
+    since = datetime.utcnow() - timedelta(seconds=max_age_s)
+    shared = (
+        db.query(models.AnalysisKey)
+        .filter(models.AnalysisKey.user_id == user_id, models.AnalysisKey.idempotency_key == key,
+                models.AnalysisKey.created_at >= since)
+        .order_by(models.AnalysisKey.id.desc())
+        .first()
+    )
+    return get_analysis(db, shared.analysis_id) if shared else None
+
+def add_analysis_key(db: Session, user_id: int, key: str, analysis_id: int):
+    """Record key for an analysis computed by another (identical, concurrent) request"""
+    db.add(models.AnalysisKey(user_id=user_id, idempotency_key=key, analysis_id=analysis_id))
+    db.commit()
+
+def find_reusable_analysis(db: Session, user_id: int, resume_sha: str, jd_sha: str, model: str, max_age_s: float):
+    """Latest complete (non-degraded) analysis of the same file, JD and models"""
+    return (
+        _recent_user_analyses(db, user_id, max_age_s)
+        .join(models.Analysis.job_description)
+        .filter(
+            models.Resume.content_sha256 == resume_sha,
+            models.JobDescription.sha256 == jd_sha,
+            models.Analysis.model == model,
+            models.Analysis.degraded.is_(False),
+            models.Analysis.result_json.isnot(None),
+        )
+        .order_by(models.Analysis.id.desc())
+        .first()
+    )
+
+def create_posting(db: Session, owner_id: int, title: str, jd: str, company: str = None):
+    jd_row = get_or_create_jd(db, jd)
+    p = models.JobPosting(owner_id=owner_id, title=title, company=company, jd_id=jd_row.id,
+                          artifacts_status=artifacts_status_for(jd_row))
+    db.add(p)
+    db.commit()
+    db.refresh(p)
+    return p
+
+def get_posting(db: Session, posting_id: int):
+    return db.query(models.JobPosting).filter(models.JobPosting.id == posting_id).first()
+
+def list_postings(db: Session, status: str = "open", owner_id: int = None):
+    """Postings with status (None for any); postings that aren't open only if owner_id owns them"""
+    q = db.query(models.JobPosting).options(
+        selectinload(models.JobPosting.job_description).undefer(models.JobDescription.text)
+    )
+    if status:
+        q = q.filter(models.JobPosting.status == status)
+    if status != "open":
+        q = q.filter(or_(models.JobPosting.status == "open", models.JobPosting.owner_id == owner_id))
+    return q.order_by(models.JobPosting.created_at.desc()).all()
+
+def update_posting(db: Session, p: models.JobPosting, title: str = None, company: str = None,
+                   jd: str = None, status: str = None):
+    if title is not None:
+        p.title = title
+    if company is not None:
+        p.company = company
+    if status is not None:
+        p.status = status
+    if jd is not None and jd_hash(jd) != p.job_description.sha256:
+        jd_row = get_or_create_jd(db, jd)
+        p.jd_id = jd_row.id
+        p.job_description = jd_row
+        p.artifacts_status = artifacts_status_for(jd_row)
+    db.commit()
+    db.refresh(p)
+    return p
+
+def delete_posting(db: Session, p: models.JobPosting):
+    db.delete(p)
+    db.commit()
+
+def artifacts_status_for(jd_row: models.JobDescription) -> str:
+    return "ready" if jd_row.embedding_model == Config.EMBEDDING_MODEL else "pending"
+
+def save_jd_artifacts(db: Session, jd_row: models.JobDescription, keywords: dict, requirements: list,
+                      embedding: bytes, requirement_embeddings: bytes, model: str):
+    jd_row.keywords = json.dumps(keywords)
+    jd_row.requirements = json.dumps(requirements)
+    jd_row.embedding = embedding
+    jd_row.requirement_embeddings = requirement_embeddings
+    jd_row.embedding_model = model
+    db.commit()
+
+def set_artifacts_status(db: Session, jd_id: int, status: str):
+    db.query(models.JobPosting).filter(models.JobPosting.jd_id == jd_id).update(
+        {models.JobPosting.artifacts_status: status}, synchronize_session=False
+    )
+    db.commit()
+
+def matchable_postings(db: Session):
+    """Open postings whose JD artifacts are ready for the current embedding model"""
+    return (
+        db.query(models.JobPosting)
+        .join(models.JobPosting.job_description)
+        .options(contains_eager(models.JobPosting.job_description))
+        .filter(
+            models.JobPosting.status == "open",
+            models.JobPosting.artifacts_status == "ready",
+            models.JobDescription.embedding_model == Config.EMBEDDING_MODEL,
+        )
+        .all()
+    )
@@ -0,0 +1,58 @@
+import zlib
+from sqlalchemy.types import TypeDecorator, LargeBinary
+from .config import Config
+
+try:
+    import zstandard
+except ImportError:  # optional: TEXT_COMPRESSION=zstd needs `pip install zstandard`
+    zstandard = None
+
+# First byte of every stored value says how the rest is encoded
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+
+
+def compress_text(text: str, method: str = None, min_bytes: int = None) -> bytes:
+    """Encode text for a CompressedText column; short values are kept raw"""
+    method = method or Config.TEXT_COMPRESSION
+    min_bytes = Config.COMPRESS_MIN_BYTES if min_bytes is None else min_bytes
+    raw = text.encode("utf-8")
+    if len(raw) < min_bytes or method == "none":
+        return RAW + raw
+    if method == "zstd":
+        if zstandard is None:
+            raise RuntimeError("TEXT_COMPRESSION=zstd requires the zstandard package")
+        packed = ZSTD + zstandard.ZstdCompressor(level=3).compress(raw)
+    else:
+        packed = ZLIB + zlib.compress(raw, 6)
+    return packed if len(packed) < len(raw) + 1 else RAW + raw
+
+
+def decompress_text(value) -> str:
+    if isinstance(value, str):
+        return value  # row written before the column was compressed
+    value = bytes(value)
+    header, body = value[:1], value[1:]
+    if header == RAW:
+        return body.decode("utf-8")
+    if header == ZLIB:
+        return zlib.decompress(body).decode("utf-8")
+    if header == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Reading zstd-compressed text requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(body).decode("utf-8")
+    raise ValueError(f"Unknown text encoding header: {header!r}")
+
+
+class CompressedText(TypeDecorator):
+    """Text stored as zlib/zstd-compressed bytes, transparently to the ORM"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else decompress_text(value)
@@ -5,8 +5,12 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, HTMLResponse
 from .api import router
 from .database import Base, engine
+from .config import Config
+from backend.services.ollama_client import breaker, warm_model
+from backend.services.executors import configure_torch_threads, executor_stats
 import os
 import logging
+import threading
 import time
 
 logging.basicConfig(level=logging.INFO)
@@ -58,15 +62,24 @@ def create_app():
             logger.info("✅ Database tables created successfully")
         except Exception as e:
             logger.error(f"❌ Error creating database tables: {str(e)}")
+        configure_torch_threads()
+        if Config.OLLAMA_WARMUP:
+            # Load the LLM in the background so the first user doesn't pay for it
+            threading.Thread(target=warm_model, name="ollama-warmup", daemon=True).start()
     
     # Include API router FIRST (before static files)
     app.include_router(router, prefix="/api")
     
     # Health check endpoint
     @app.get("/health")
-    def health_check():
+    async def health_check():
         """Health check endpoint"""
-        return {"status": "healthy", "service": "ATS Resume Matcher"}
+        return {
+            "status": "healthy",
+            "service": "ATS Resume Matcher",
+            "llm": {"circuit": breaker.state, "consecutive_failures": breaker.failures},
+            "executors": executor_stats(),
+        }
     
     # Root endpoint - serve index.html
     @app.get("/")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, DateTime, LargeBinary, Boolean
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from .database import Base
+from .db_types import CompressedText
 
 
 class User(Base):
@@ -17,19 +18,72 @@ class Resume(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     filename = Column(String(255), nullable=False)
-    text = Column(Text, nullable=False)
+    content_sha256 = Column(String(64), index=True)  # of the uploaded file
+    # large text is compressed and only loaded when accessed
+    text = deferred(Column(CompressedText, nullable=False))
     created_at = Column(DateTime, default=datetime.utcnow)
     owner = relationship("User", back_populates="resumes")
     analyses = relationship("Analysis", back_populates="resume")
 
 
+class JobDescription(Base):
+    """A JD stored once, shared by every analysis run against it"""
+    __tablename__ = "job_descriptions"
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    text = deferred(Column(CompressedText, nullable=False))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # precomputed once per JD (see services/job_artifacts.py); vectors are float32 bytes
+    keywords = Column(Text)
+    requirements = deferred(Column(CompressedText), group="artifacts")
+    embedding = deferred(Column(LargeBinary), group="artifacts")
+    requirement_embeddings = deferred(Column(LargeBinary), group="artifacts")
+    embedding_model = Column(String(255))
+    analyses = relationship("Analysis", back_populates="job_description")
+    postings = relationship("JobPosting", back_populates="job_description")
+
+
+class JobPosting(Base):
+    __tablename__ = "job_postings"
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    title = Column(String(255), nullable=False)
+    company = Column(String(255))
+    jd_id = Column(Integer, ForeignKey("job_descriptions.id"), nullable=False)
+    status = Column(String(20), default="open", index=True)  # open | closed
+    artifacts_status = Column(String(20), default="pending")  # pending | ready | failed
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    job_description = relationship("JobDescription", back_populates="postings")
+
+
 class Analysis(Base):
     __tablename__ = "analyses"
     id = Column(Integer, primary_key=True, index=True)
     resume_id = Column(Integer, ForeignKey("resumes.id"))
-    jd = Column(Text)
+    jd_id = Column(Integer, ForeignKey("job_descriptions.id"), index=True)
     score = Column(Float)
     matched_keywords = Column(Text)
-    analysis_text = Column(Text)
+    analysis_text = deferred(Column(CompressedText))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # for result reuse / idempotent replays of /analyze
+    model = Column(String(255))
+    degraded = Column(Boolean, default=False)
+    idempotency_key = Column(String(255), index=True)
+    result_json = deferred(Column(CompressedText))
     resume = relationship("Resume", back_populates="analyses")
+    job_description = relationship("JobDescription", back_populates="analyses")
+
+    @property
+    def jd(self):
+        return self.job_description.text if self.job_description else None
+
+
+class AnalysisKey(Base):
+    """Idempotency-Key of a request that was served another request's analysis"""
+    __tablename__ = "analysis_keys"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    idempotency_key = Column(String(255), index=True)
+    analysis_id = Column(Integer, ForeignKey("analyses.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
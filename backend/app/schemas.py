@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import datetime
 
 class UserCreate(BaseModel):
     email: str
@@ -11,8 +12,81 @@ class TokenResponse(BaseModel):
     user_id: int
 
 
+class GapItem(BaseModel):
+    requirement: str
+    status: str
+    evidence: str = ""
+
+
+class RequirementMatch(BaseModel):
+    requirement: str
+    similarity: float
+    covered: bool
+    evidence: str
+
+
+class CoverageResult(BaseModel):
+    score: float
+    covered: int
+    total: int
+    requirements: List[RequirementMatch]
+
+
+class SectionScore(BaseModel):
+    section: str
+    kind: str
+    similarity: float
+
+
 class AnalyzeResponse(BaseModel):
     resume_id: int
+    analysis_id: Optional[int] = None
     score: float
     matched_keywords: List[str]
+    missing_keywords: List[str] = []
+    analysis: str
+    gaps: List[GapItem] = []
+    coverage: Optional[CoverageResult] = None
+    section_scores: List[SectionScore] = []
+    prompt_tokens: Optional[int] = None
+    degraded: bool = False
+    reused: bool = False
+
+
+class NarrativeResponse(BaseModel):
+    analysis_id: int
+    resume_id: int
     analysis: str
+    matched_keywords: List[str]
+    gaps: List[GapItem] = []
+    prompt_tokens: Optional[int] = None
+    degraded: bool = False
+
+
+class JobPostingOut(BaseModel):
+    id: int
+    title: str
+    company: Optional[str] = None
+    jd: str
+    status: str
+    artifacts_status: str
+    owner_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class PostingMatch(BaseModel):
+    posting_id: int
+    title: str
+    company: Optional[str] = None
+    score: float
+    coverage: float
+    covered: int
+    total: int
+    matched_keywords: List[str]
+    missing_keywords: List[str]
+
+
+class MatchResponse(BaseModel):
+    postings_scored: int
+    matches: List[PostingMatch]
@@ -0,0 +1,37 @@
+"""Everything /analyze compares, encoded in one batched call.
+
+The semantic score, requirement coverage, RAG context and section scores
+all need vectors of the same resume (and the JD). Encoding them together
+means one encoder pass per request instead of one per stage; each stage
+then only does matrix products on the shared vectors.
+"""
+import numpy as np
+from .coverage import chunk_resume, split_requirements
+from .basic_analysis import resume_sections, SECTION_CHARS
+from .embeddings_index import EmbeddingsIndex
+from backend.app.config import Config
+
+
+def embed_analysis_inputs(resume_text: str, jd: str, model_name: str = None, batch_size: int = 64) -> dict:
+    """Vectors of the JD, the whole resume, its chunks, the JD requirements and the resume sections.
+
+    Chunks (chunk_resume) are the units of both coverage and retrieval.
+    """
+    chunks = chunk_resume(resume_text)
+    requirements = split_requirements(jd) or [jd.strip()[:2000]]
+    sections = resume_sections(resume_text)
+    texts = [jd, resume_text] + chunks + requirements + [s["text"][:SECTION_CHARS] for s in sections]
+    vecs = np.asarray(EmbeddingsIndex(model_name or Config.EMBEDDING_MODEL).encode(texts, batch_size=batch_size))
+
+    c_end = 2 + len(chunks)
+    r_end = c_end + len(requirements)
+    return {
+        "jd_vec": vecs[0],
+        "resume_vec": vecs[1],
+        "chunks": chunks,
+        "chunk_vecs": vecs[2:c_end],
+        "requirements": requirements,
+        "req_vecs": vecs[c_end:r_end],
+        "sections": sections,
+        "section_vecs": vecs[r_end:],
+    }
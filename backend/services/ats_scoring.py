@@ -1,11 +1,14 @@
 import re
+import numpy as np
 from .embeddings_index import EmbeddingsIndex
 from backend.app.config import Config
 
-def simple_keyword_extract(text: str, min_len: int = 2):
+def tokenize(text: str, min_len: int = 2):
     tokens = re.findall(r"[A-Za-z+#\.\-0-9]+", text)
-    tokens = [t for t in tokens if len(t) >= min_len]
-    return sorted(set([t.lower() for t in tokens]))
+    return [t.lower() for t in tokens if len(t) >= min_len]
+
+def simple_keyword_extract(text: str, min_len: int = 2):
+    return sorted(set(tokenize(text, min_len)))
 
 def semantic_score(resume_text: str, jd_text: str, embed_model: str = None):
     embed_model = embed_model or Config.EMBEDDING_MODEL
@@ -16,3 +19,13 @@ def semantic_score(resume_text: str, jd_text: str, embed_model: str = None):
     if not res:
         return 0.0
     return round(res[0][1] * 100, 2)
+
+def semantic_scores(resume_texts, jd_text: str, embed_model: str = None, batch_size: int = 16):
+    """semantic_score for many resumes: the JD is encoded once, resumes in large batches"""
+    embed_model = embed_model or Config.EMBEDDING_MODEL
+    emb = EmbeddingsIndex(embed_model)
+    if not resume_texts:
+        return []
+    jd_vec = emb.encode([jd_text])[0]
+    vecs = emb.encode(list(resume_texts), batch_size=batch_size)
+    return [round(float(s) * 100, 2) for s in np.asarray(vecs) @ jd_vec]
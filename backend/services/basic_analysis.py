@@ -0,0 +1,119 @@
+"""Deterministic (non-LLM) analysis from embedding and keyword results.
+
+Used by /analyze when the request's deadline can't cover an LLM call or the
+LLM is unavailable; the response is then flagged as degraded.
+"""
+import numpy as np
+from collections import Counter
+from typing import List, Optional, Tuple
+from .ats_scoring import tokenize
+from .embeddings_index import EmbeddingsIndex
+from .prompt_builder import strip_jd_boilerplate
+from .resume_rewriter import split_sections
+from backend.app.config import Config
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could do does
+each either etc for from has have having how if in including into is it its job least like may more
+most must new not of on or other our ours over per plus preferred required requirements responsibilities
+role such than that the their them then there these they this those through to under up using via
+was we well were what when where which while who will with within work working would years you your
+ability able experience strong excellent good knowledge skills team teams understanding
+""".split())
+
+SECTION_CHARS = 2000  # per-section text encoded for similarity
+
+
+def jd_terms(jd: str, limit: int = 30) -> List[str]:
+    """Most frequent content words of a JD (boilerplate and stopwords removed)"""
+    counts = Counter(
+        t.strip(".-") for t in tokenize(strip_jd_boilerplate(jd), min_len=3)
+        if t.strip(".-") not in STOPWORDS and not t.strip(".-").isdigit()
+    )
+    counts.pop("", None)
+    return [t for t, _ in counts.most_common(limit)]
+
+
+def keyword_match(resume_text: str, jd: str, jd_keywords: Optional[dict] = None,
+                  limit: int = 20) -> Tuple[List[str], List[str]]:
+    """(matched, missing) JD keywords; LLM-extracted skills when given, else jd_terms"""
+    candidates = list((jd_keywords or {}).get("skills", [])) or jd_terms(jd)
+    low = resume_text.lower()
+    raw = tokenize(resume_text)
+    tokens = set(raw) | {t.strip(".-") for t in raw}
+    matched, missing = [], []
+    for k in candidates:
+        key = k.lower().strip()
+        present = key in low if " " in key else key in tokens
+        (matched if present else missing).append(k)
+    return matched, missing[:limit]
+
+
+def resume_sections(resume_text: str) -> List[dict]:
+    """Sections scored by section_similarity (the whole resume if none are found)"""
+    sections = [s for s in split_sections(resume_text) if s["kind"] != "other" or s["title"]]
+    return sections or [{"kind": "resume", "title": "Resume", "text": resume_text}]
+
+
+def section_scores(sections: List[dict], section_vecs: np.ndarray, jd_vec: np.ndarray) -> List[dict]:
+    sims = np.asarray(section_vecs) @ np.asarray(jd_vec)
+    return [
+        {"section": s["title"] or s["kind"], "kind": s["kind"], "similarity": round(float(sim) * 100, 2)}
+        for s, sim in zip(sections, sims)
+    ]
+
+
+def section_similarity(resume_text: str, jd: str, model_name: str = None) -> List[dict]:
+    """Cosine similarity (0-100) of each resume section to the JD, one batched encode"""
+    sections = resume_sections(resume_text)
+    emb = EmbeddingsIndex(model_name or Config.EMBEDDING_MODEL)
+    vecs = emb.encode([jd] + [s["text"][:SECTION_CHARS] for s in sections])
+    return section_scores(sections, vecs[1:], vecs[0])
+
+
+def coverage_gaps(coverage: Optional[dict]) -> List[dict]:
+    """GapItem-shaped requirement statuses from a CoverageEngine result"""
+    if not coverage:
+        return []
+    partial_at = (Config.COVERAGE_LOW + Config.COVERAGE_HIGH) / 2
+    gaps = []
+    for req in coverage["requirements"]:
+        if req["covered"]:
+            status = "met"
+        elif req["similarity"] >= partial_at:
+            status = "partial"
+        else:
+            status = "missing"
+        gaps.append({
+            "requirement": req["requirement"],
+            "status": status,
+            "evidence": req["evidence"][:200] if status != "missing" else "",
+        })
+    return gaps
+
+
+def deterministic_analysis(score: float, coverage: Optional[dict], sections: List[dict],
+                           missing: List[str]) -> dict:
+    """Plain-text analysis and gaps built only from scores; no LLM involved"""
+    gaps = coverage_gaps(coverage)
+    lines = [
+        "Quick analysis (AI narrative not included).",
+        f"Overall semantic match: {score:.1f}%.",
+    ]
+    if coverage:
+        lines.append(
+            f"Requirement coverage: {coverage['covered']} of {coverage['total']} requirements "
+            f"clearly covered ({coverage['score']:.1f}%)."
+        )
+        not_met = [g["requirement"] for g in gaps if g["status"] == "missing"]
+        if not_met:
+            lines.append("Not addressed: " + "; ".join(not_met[:5]) + ".")
+    if len(sections) > 1:
+        ranked = sorted(sections, key=lambda s: s["similarity"], reverse=True)
+        lines.append(
+            f"Strongest section: {ranked[0]['section']} ({ranked[0]['similarity']:.1f}%); "
+            f"weakest: {ranked[-1]['section']} ({ranked[-1]['similarity']:.1f}%)."
+        )
+    if missing:
+        lines.append("Missing keywords: " + ", ".join(missing) + ".")
+    return {"analysis": "\n".join(lines), "gaps": gaps}
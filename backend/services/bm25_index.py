@@ -0,0 +1,71 @@
+import math
+import logging
+from collections import Counter
+from typing import List, Tuple
+from .ats_scoring import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class BM25Index:
+    """Okapi BM25 over the same tokens used by simple_keyword_extract.
+
+    Cheap to build (no model involved), so it can sit in front of the dense
+    index and decide which chunks are worth encoding at all.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.texts: List[str] = []
+        self.doc_freqs: List[Counter] = []
+        self.doc_lens: List[int] = []
+        self.idf = {}
+        self.avgdl = 0.0
+
+    def build(self, docs: List[str]):
+        if not docs:
+            raise ValueError("Cannot build index from empty document list")
+
+        self.texts = docs
+        self.doc_freqs = [Counter(tokenize(d)) for d in docs]
+        self.doc_lens = [sum(f.values()) for f in self.doc_freqs]
+        self.avgdl = (sum(self.doc_lens) / len(docs)) or 1.0
+
+        df = Counter()
+        for freqs in self.doc_freqs:
+            df.update(freqs.keys())
+        n = len(docs)
+        # BM25+ style idf: always positive so common terms never subtract
+        self.idf = {t: math.log(1 + (n - c + 0.5) / (c + 0.5)) for t, c in df.items()}
+
+        logger.info(f"BM25 index built with {n} documents")
+
+    def scores(self, q: str) -> List[float]:
+        """BM25 score of every indexed document for query q"""
+        if not self.texts:
+            raise RuntimeError("Index not built")
+
+        q_terms = set(tokenize(q))
+        out = []
+        for freqs, dl in zip(self.doc_freqs, self.doc_lens):
+            s = 0.0
+            norm = self.k1 * (1 - self.b + self.b * dl / self.avgdl)
+            for t in q_terms:
+                tf = freqs.get(t)
+                if tf:
+                    s += self.idf[t] * tf * (self.k1 + 1) / (tf + norm)
+            out.append(s)
+        return out
+
+    def top_ids(self, q: str, k: int, scores: List[float] = None) -> List[int]:
+        """Indices of the k best-scoring documents with a non-zero score"""
+        scores = self.scores(q) if scores is None else scores
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        return [i for i in ranked[:k] if scores[i] > 0]
+
+    def query(self, q: str, k: int = 3) -> List[Tuple[str, float]]:
+        if not q.strip():
+            return []
+        scores = self.scores(q)
+        return [(self.texts[i], scores[i]) for i in self.top_ids(q, k, scores)]
@@ -0,0 +1,217 @@
+"""Score a directory of resumes against one JD, offline.
+
+No HTTP, auth or database: files are parsed in a process pool, encoded in
+large batches and each result is appended to the output (JSONL or CSV,
+picked from the extension) as soon as its batch is done. Re-running with
+the same --out skips files already written, so an interrupted run resumes.
+
+    python -m backend.services.bulk_score --jd jd.txt --resumes ./archive --out scores.jsonl
+    python -m backend.services.bulk_score --jd jd.txt --resumes ./archive --out scores.csv --no-llm
+"""
+import os
+import csv
+import json
+import time
+import logging
+import argparse
+from multiprocessing import Pool
+from typing import Iterable, List, Set
+from .parser import parse_path
+from .ats_scoring import semantic_scores, simple_keyword_extract
+from .coverage import CoverageEngine
+from .jd_extractor import extract_keywords_llm
+from .ollama_client import call_ollama
+from .prompt_builder import build_analysis_prompt
+from .executors import configure_torch_threads
+from backend.app.config import Config
+
+logger = logging.getLogger(__name__)
+
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
+CSV_FIELDS = ["file", "score", "coverage", "matched_keywords", "error", "analysis"]
+
+
+def find_resumes(root: str) -> List[str]:
+    paths = []
+    for dirpath, _, files in os.walk(root):
+        for f in files:
+            if f.lower().endswith(RESUME_EXTENSIONS):
+                paths.append(os.path.relpath(os.path.join(dirpath, f), root))
+    return sorted(paths)
+
+
+def _parse_one(args):
+    root, rel = args
+    try:
+        return rel, parse_path(os.path.join(root, rel)), None
+    except Exception as e:
+        return rel, None, str(e)
+
+
+def _complete_length(data: bytes, quoted: bool) -> int:
+    """Length of data up to the end of its last complete record.
+
+    JSONL records are single lines. CSV fields (the LLM analysis) may hold
+    quoted newlines, so a CSV record only ends at a newline outside quotes:
+    one where the quotes seen so far are balanced ("" escapes come in pairs).
+    """
+    if not quoted:
+        return data.rfind(b"\n") + 1
+    end = pos = quotes = 0
+    for line in data.split(b"\n")[:-1]:
+        pos += len(line) + 1
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            end = pos
+    return end
+
+
+def _trim_partial_record(path: str):
+    """Drop a last record cut short by an interrupted run"""
+    with open(path, "rb+") as fh:
+        data = fh.read()
+        end = _complete_length(data, quoted=path.endswith(".csv"))
+        if end < len(data):
+            fh.truncate(end)
+
+
+def load_done(out_path: str) -> Set[str]:
+    if not os.path.exists(out_path):
+        return set()
+    _trim_partial_record(out_path)
+    done = set()
+    with open(out_path, newline="", encoding="utf-8") as fh:
+        if out_path.endswith(".csv"):
+            done = {row["file"] for row in csv.DictReader(fh)}
+        else:
+            for line in fh:
+                if line.strip():
+                    done.add(json.loads(line)["file"])
+    return done
+
+
+class ResultWriter:
+    def __init__(self, out_path: str):
+        self.is_csv = out_path.endswith(".csv")
+        new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+        self.fh = open(out_path, "a", newline="", encoding="utf-8")
+        if self.is_csv:
+            self.writer = csv.DictWriter(self.fh, fieldnames=CSV_FIELDS)
+            if new_file:
+                self.writer.writeheader()
+
+    def write(self, record: dict):
+        if self.is_csv:
+            row = dict(record, matched_keywords=";".join(record.get("matched_keywords") or []))
+            self.writer.writerow({k: row.get(k, "") for k in CSV_FIELDS})
+        else:
+            self.fh.write(json.dumps(record) + "\n")
+
+    def flush(self):
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+
+    def close(self):
+        self.fh.close()
+
+
+def jd_skills(jd: str, use_llm: bool) -> List[str]:
+    if use_llm:
+        try:
+            return extract_keywords_llm(jd).get("skills", [])
+        except Exception as e:
+            logger.warning(f"LLM keyword extraction failed, using simple extraction: {str(e)}")
+    return simple_keyword_extract(jd)[:50]
+
+
+def narrative(text: str, jd: str) -> str:
+    paras = [p for p in text.split("\n\n") if p.strip()] or [text[:1000]]
+    prompt, _ = build_analysis_prompt(paras, jd)
+    try:
+        return call_ollama(prompt)
+    except Exception as e:
+        return f"LLM unavailable: {str(e)}"
+
+
+def score_batch(batch: list, jd: str, skills: List[str], batch_size: int, narratives: bool,
+                coverage_engine: CoverageEngine = None, requirements=None) -> Iterable[dict]:
+    ok = [(rel, text) for rel, text, err in batch if text]
+    texts = [t for _, t in ok]
+    scores = semantic_scores(texts, jd, batch_size=batch_size) if ok else []
+    if coverage_engine is not None and ok:
+        coverage = [c["score"] for c in coverage_engine.score_many(texts, requirements=requirements[0],
+                                                                     req_vecs=requirements[1])]
+    else:
+        coverage = [None] * len(ok)
+    for (rel, text), score, cov in zip(ok, scores, coverage):
+        low = text.lower()
+        record = {"file": rel, "score": score, "coverage": cov,
+                  "matched_keywords": [k for k in skills if k.lower() in low]}
+        if narratives:
+            record["analysis"] = narrative(text, jd)
+        yield record
+    for rel, text, err in batch:
+        if not text:
+            yield {"file": rel, "score": None, "matched_keywords": [], "error": err or "No text extracted"}
+
+
+def run(jd: str, root: str, out_path: str, workers: int, batch_size: int, use_llm: bool, narratives: bool) -> int:
+    done = load_done(out_path)
+    todo = [p for p in find_resumes(root) if p not in done]
+    logger.info(f"{len(todo)} resumes to score ({len(done)} already in {out_path})")
+    if not todo:
+        return 0
+
+    skills = jd_skills(jd, use_llm)
+    coverage_engine = CoverageEngine(batch_size=batch_size)
+    writer = ResultWriter(out_path)
+    written = 0
+    start = time.perf_counter()
+    try:
+        # fork the parsers before the embedding model (and its threads) is loaded
+        with Pool(processes=workers) as pool:
+            requirements = coverage_engine.encode_requirements(jd)
+            batch = []
+            for item in pool.imap_unordered(_parse_one, [(root, p) for p in todo], chunksize=8):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    for record in score_batch(batch, jd, skills, batch_size, narratives, coverage_engine, requirements):
+                        writer.write(record)
+                        written += 1
+                    writer.flush()
+                    batch = []
+                    logger.info(f"{written}/{len(todo)} scored ({written / (time.perf_counter() - start):.1f}/s)")
+            for record in score_batch(batch, jd, skills, batch_size, narratives, coverage_engine, requirements):
+                writer.write(record)
+                written += 1
+            writer.flush()
+    finally:
+        writer.close()
+    return written
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline bulk ATS scoring of a resume directory")
+    ap.add_argument("--jd", required=True, help="Path to the job description text file")
+    ap.add_argument("--resumes", required=True, help="Directory of .pdf/.docx/.txt resumes (searched recursively)")
+    ap.add_argument("--out", required=True, help="Output file, .jsonl or .csv")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parser processes")
+    ap.add_argument("--batch-size", type=int, default=256, help="Resumes per encode batch")
+    ap.add_argument("--no-llm", action="store_true", help="Skip every LLM call (simple JD keyword extraction)")
+    ap.add_argument("--narratives", action="store_true", help="Generate an LLM narrative per resume (slow)")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    configure_torch_threads(os.cpu_count())  # the only encoder in this process
+    with open(args.jd, encoding="utf-8") as fh:
+        jd = fh.read()
+    if len(jd.strip()) < 10:
+        ap.error("Job description must be at least 10 characters")
+
+    written = run(jd, args.resumes, args.out, args.workers, args.batch_size,
+                  use_llm=not args.no_llm, narratives=args.narratives and not args.no_llm)
+    logger.info(f"Wrote {written} results to {args.out} (model {Config.EMBEDDING_MODEL})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling a dependency that is known to be down"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``allow()`` returns False for ``reset_timeout`` seconds. Then one caller
+    runs ``probe`` (a cheap health check, if given); on success the circuit
+    goes half-open and lets a single real call through, whose outcome closes
+    or re-opens it. A trial that reports neither within ``trial_timeout``
+    (default ``reset_timeout``) re-opens the circuit, so a lost outcome
+    can't leave it half-open for good.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float,
+                 probe: Optional[Callable[[], bool]] = None, trial_timeout: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trial_timeout = reset_timeout if trial_timeout is None else trial_timeout
+        self.probe = probe
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and time.monotonic() - self.trial_started >= self.trial_timeout:
+                logger.warning(f"{self.name} trial call never reported back, circuit re-opened")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+                return False
+            if self.state == HALF_OPEN or self._trial_in_flight:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._trial_in_flight = True
+
+        # Only this thread gets here until the trial resolves
+        healthy = True
+        if self.probe is not None:
+            try:
+                healthy = bool(self.probe())
+            except Exception:
+                healthy = False
+        with self._lock:
+            if not healthy:
+                self._trial_in_flight = False
+                self.opened_at = time.monotonic()
+                logger.info(f"{self.name} probe failed, circuit stays open")
+                return False
+            self.state = HALF_OPEN
+            self.trial_started = time.monotonic()
+            logger.info(f"{self.name} probe succeeded, circuit half-open")
+            return True
+
+    def release_trial(self):
+        """The caller gave up before reaching the dependency: no outcome to report.
+
+        A half-open circuit goes back to open with its old opened_at, so the
+        next caller probes again right away.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+                self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"{self.name} recovered, circuit closed")
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"{self.name} circuit opened after {self.failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
@@ -0,0 +1,130 @@
+import re
+import logging
+import numpy as np
+from typing import List, Sequence
+from .embeddings_index import EmbeddingsIndex
+from .prompt_builder import strip_jd_boilerplate
+from backend.app.config import Config
+
+logger = logging.getLogger(__name__)
+
+_BULLET = re.compile(r"^\s*(?:[-*•·▪–]|\d+[.)])\s*")
+_SENTENCE = re.compile(r"(?<=[.;!?])\s+(?=[A-Z])")
+
+
+def split_requirements(jd: str, min_words: int = 3, max_requirements: int = 40) -> List[str]:
+    """Individual requirements from a JD: bullet lines and sentences, boilerplate removed"""
+    reqs, seen = [], set()
+    for line in strip_jd_boilerplate(jd).splitlines():
+        line = _BULLET.sub("", line).strip()
+        if not line or line.endswith(":"):
+            continue
+        for sentence in _SENTENCE.split(line):
+            sentence = sentence.strip(" .;")
+            key = sentence.lower()
+            if len(sentence.split()) >= min_words and key not in seen:
+                seen.add(key)
+                reqs.append(sentence)
+    return reqs[:max_requirements]
+
+
+def chunk_resume(text: str, max_words: int = 60, overlap: int = 15) -> List[str]:
+    """Paragraphs, with long ones cut into overlapping word windows"""
+    chunks = []
+    for para in re.split(r"\n\s*\n", text):
+        words = para.split()
+        if not words:
+            continue
+        if len(words) <= max_words:
+            chunks.append(" ".join(words))
+            continue
+        step = max_words - overlap
+        for start in range(0, len(words) - overlap, step):
+            chunks.append(" ".join(words[start:start + max_words]))
+    return chunks or [text.strip()[:2000]]
+
+
+def _calibrate(sim: np.ndarray) -> np.ndarray:
+    """Map cosine similarity to 0..1 credit between COVERAGE_LOW and COVERAGE_HIGH"""
+    low, high = Config.COVERAGE_LOW, Config.COVERAGE_HIGH
+    return np.clip((sim - low) / (high - low), 0.0, 1.0)
+
+
+def coverage_matrix(chunk_vecs: np.ndarray, chunk_counts: Sequence[int],
+                    req_vecs: np.ndarray, req_counts: Sequence[int]):
+    """Coverage of every resume against every JD in one similarity matrix.
+
+    chunk_vecs stacks the chunk embeddings of all resumes (chunk_counts rows
+    each) and req_vecs the requirement embeddings of all JDs (req_counts
+    rows each); all rows L2-normalized. Returns (coverage [n_resumes x n_jds]
+    in 0..1, best_sim [n_resumes x n_reqs], sims [n_chunks x n_reqs]).
+    """
+    sims = chunk_vecs @ req_vecs.T  # one BLAS call: all chunks x all requirements
+    chunk_starts = np.concatenate([[0], np.cumsum(chunk_counts)[:-1]]).astype(np.intp)
+    req_starts = np.concatenate([[0], np.cumsum(req_counts)[:-1]]).astype(np.intp)
+    best_sim = np.maximum.reduceat(sims, chunk_starts, axis=0)
+    credit = np.add.reduceat(_calibrate(best_sim), req_starts, axis=1)
+    coverage = credit / np.asarray(req_counts, dtype=np.float32)
+    return coverage, best_sim, sims
+
+
+def coverage_results(requirements: List[str], req_vecs: np.ndarray,
+                     chunks: List[List[str]], chunk_vecs: np.ndarray) -> List[dict]:
+    """Coverage of each resume (its chunks and their stacked vectors) against one JD"""
+    counts = [len(c) for c in chunks]
+    coverage, best_sim, sims = coverage_matrix(chunk_vecs, counts, req_vecs, [len(requirements)])
+
+    results = []
+    start = 0
+    for i, n in enumerate(counts):
+        best_idx = sims[start:start + n].argmax(axis=0)
+        covered = best_sim[i] >= Config.COVERAGE_HIGH
+        results.append({
+            "score": round(float(coverage[i, 0]) * 100, 2),
+            "covered": int(covered.sum()),
+            "total": len(requirements),
+            "requirements": [
+                {
+                    "requirement": req,
+                    "similarity": round(float(best_sim[i, j]), 4),
+                    "covered": bool(covered[j]),
+                    "evidence": chunks[i][best_idx[j]],
+                }
+                for j, req in enumerate(requirements)
+            ],
+        })
+        start += n
+    return results
+
+
+class CoverageEngine:
+    """Scores resumes by how well their chunks cover a JD's requirements"""
+
+    def __init__(self, model_name: str = None, batch_size: int = 64):
+        self.encoder = EmbeddingsIndex(model_name or Config.EMBEDDING_MODEL)
+        self.batch_size = batch_size
+
+    def encode_requirements(self, jd: str):
+        reqs = split_requirements(jd) or [jd.strip()[:2000]]
+        return reqs, self.encoder.encode(reqs, batch_size=self.batch_size)
+
+    def score_many(self, resume_texts: List[str], jd: str = None,
+                   requirements: List[str] = None, req_vecs: np.ndarray = None) -> List[dict]:
+        """Coverage for a pool of resumes against one JD.
+
+        Pass precomputed requirements/req_vecs to skip re-encoding the JD.
+        Every chunk of every resume is encoded in one batched call and scored
+        in a single matrix product.
+        """
+        if requirements is None or req_vecs is None:
+            requirements, req_vecs = self.encode_requirements(jd)
+        if not resume_texts:
+            return []
+
+        chunks = [chunk_resume(t) for t in resume_texts]
+        flat = [c for cs in chunks for c in cs]
+        chunk_vecs = self.encoder.encode(flat, batch_size=self.batch_size)
+        return coverage_results(requirements, req_vecs, chunks, chunk_vecs)
+
+    def score(self, resume_text: str, jd: str) -> dict:
+        return self.score_many([resume_text], jd)[0]
@@ -0,0 +1,250 @@
+"""Shared embedding process: one model, dynamic micro-batching across workers.
+
+Start it next to uvicorn and point the workers at it:
+
+    python -m backend.services.embedding_server --socket /tmp/ats-embed.sock
+    EMBEDDING_SERVER_SOCKET=/tmp/ats-embed.sock uvicorn backend.app.main:app --workers 4
+
+Workers keep using EmbeddingsIndex; its encode() sends texts over the Unix
+socket. The client creates a shared memory block sized for the result and
+the server writes the vectors straight into it, so only the texts and a
+small JSON reply cross the socket. The client owns (and unlinks) the block.
+"""
+import os
+import json
+import time
+import queue
+import socket
+import struct
+import logging
+import argparse
+import threading
+import socketserver
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!I")
+
+
+def send_msg(sock: socket.socket, obj: dict):
+    data = json.dumps(obj).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_msg(sock: socket.socket) -> dict:
+    header = _recv_exact(sock, _HEADER.size)
+    return json.loads(_recv_exact(sock, _HEADER.unpack(header)[0]))
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Embedding server connection closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(name=name)
+    # The client owns the block; stop this process's tracker from unlinking it
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+class _Job:
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.vectors = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Collects encode jobs and runs them as one model call.
+
+    A batch is flushed when it holds max_batch texts or max_wait_ms after its
+    first job arrived, whichever comes first.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], max_batch: int, max_wait_ms: float):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> np.ndarray:
+        job = _Job(texts)
+        self._queue.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.vectors
+
+    def _loop(self):
+        while True:
+            jobs = [self._queue.get()]
+            size = len(jobs[0].texts)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                size += len(job.texts)
+
+            try:
+                vectors = self.encode_fn([t for j in jobs for t in j.texts])
+                self.batches += 1
+                self.texts += size
+                start = 0
+                for j in jobs:
+                    j.vectors = vectors[start:start + len(j.texts)]
+                    start += len(j.texts)
+            except Exception as e:
+                logger.error(f"Embedding batch failed: {str(e)}")
+                for j in jobs:
+                    j.error = e
+            for j in jobs:
+                j.done.set()
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, encode_fn, dim: int, model_name: str,
+                 max_batch: int = 64, max_wait_ms: float = 5.0):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.dim = dim
+        self.model_name = model_name
+        self.batcher = MicroBatcher(encode_fn, max_batch, max_wait_ms)
+        super().__init__(socket_path, _Handler)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server: EmbeddingServer = self.server
+        while True:
+            try:
+                msg = recv_msg(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                if msg.get("op") == "info":
+                    send_msg(self.request, {"dim": server.dim, "model": server.model_name})
+                elif msg.get("op") == "encode":
+                    vectors = server.batcher.submit(msg["texts"])
+                    shm = _attach(msg["shm"])
+                    try:
+                        out = np.ndarray(vectors.shape, dtype=np.float32, buffer=shm.buf)
+                        out[:] = vectors
+                        del out
+                    finally:
+                        shm.close()
+                    send_msg(self.request, {"ok": True, "n": len(vectors)})
+                else:
+                    send_msg(self.request, {"error": f"unknown op: {msg.get('op')}"})
+            except Exception as e:
+                logger.error(f"Embedding request failed: {str(e)}")
+                send_msg(self.request, {"error": str(e)})
+
+
+class EmbeddingClient:
+    """Talks to an EmbeddingServer; one connection per calling thread"""
+
+    def __init__(self, socket_path: str, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._dim = None
+
+    def _conn(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _request(self, msg: dict) -> dict:
+        try:
+            send_msg(self._conn(), msg)
+            reply = recv_msg(self._conn())
+        except (OSError, ConnectionError):
+            sock = getattr(self._local, "sock", None)
+            if sock is not None:
+                sock.close()
+            self._local.sock = None
+            raise
+        if "error" in reply:
+            raise RuntimeError(f"Embedding server error: {reply['error']}")
+        return reply
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            self._dim = self._request({"op": "info"})["dim"]
+        return self._dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        shape = (len(texts), self.dim)
+        shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 4)
+        try:
+            self._request({"op": "encode", "texts": list(texts), "shm": shm.name})
+            return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+def main():
+    from backend.app.config import Config
+    from .embeddings_index import EmbeddingsIndex
+    from .executors import configure_torch_threads
+
+    ap = argparse.ArgumentParser(description="Shared embedding server")
+    ap.add_argument("--socket", default=Config.EMBEDDING_SERVER_SOCKET or "/tmp/ats-embed.sock")
+    ap.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    ap.add_argument("--max-batch", type=int, default=Config.EMBED_MAX_BATCH)
+    ap.add_argument("--max-wait-ms", type=float, default=Config.EMBED_MAX_WAIT_MS)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # the server is the only encoder on the host: give torch every core
+    configure_torch_threads(os.cpu_count())
+    index = EmbeddingsIndex(args.model)
+    dim = index.encode_local(["warmup"]).shape[1]
+    def encode_fn(texts):
+        return index.encode_local(texts, batch_size=args.max_batch)
+
+    server = EmbeddingServer(args.socket, encode_fn, dim, args.model, args.max_batch, args.max_wait_ms)
+    logger.info(f"Embedding server for {args.model} (dim={dim}) listening on {args.socket}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,20 @@ import faiss
 import numpy as np
 import logging
 from typing import List, Tuple
+from backend.app.config import Config
 
 logger = logging.getLogger(__name__)
 
 _embedding_model = None  # ✅ GLOBAL SINGLETON
+_embedding_client = None
+
+
+def _get_client():
+    global _embedding_client
+    if _embedding_client is None and Config.EMBEDDING_SERVER_SOCKET:
+        from .embedding_server import EmbeddingClient
+        _embedding_client = EmbeddingClient(Config.EMBEDDING_SERVER_SOCKET)
+    return _embedding_client
 
 class EmbeddingsIndex:
     def __init__(self, model_name: str):
@@ -17,24 +27,44 @@ class EmbeddingsIndex:
     def _get_model(self):
         global _embedding_model
         if _embedding_model is None:
+            from .executors import configure_torch_threads
+            configure_torch_threads()
             logger.info("Loading embedding model into RAM...")
             _embedding_model = SentenceTransformer(self.model_name)
         return _embedding_model
 
-
-    def build(self, docs: List[str]):
-        if not docs:
-            raise ValueError("Cannot build index from empty document list")
-
+    def encode(self, texts: List[str], batch_size: int = 16) -> np.ndarray:
+        """Encode texts into normalized float32 vectors (one row per text)
+
+        Uses the shared embedding server when EMBEDDING_SERVER_SOCKET is set,
+        falling back to an in-process model if it can't be reached.
+        """
+        client = _get_client()
+        if client is not None:
+            try:
+                return client.encode(texts)
+            except (OSError, ConnectionError) as e:
+                logger.warning(f"Embedding server unavailable, encoding locally: {str(e)}")
+        return self.encode_local(texts, batch_size=batch_size)
+
+    def encode_local(self, texts: List[str], batch_size: int = 16) -> np.ndarray:
         model = self._get_model()  # ✅ lazy load
-
-        self.texts = docs
         embeddings = model.encode(
-            docs,
-            batch_size=16,  # 🔥 lower batch = less RAM spike
+            texts,
+            batch_size=batch_size,  # 🔥 lower batch = less RAM spike
             convert_to_numpy=True,
             normalize_embeddings=True  # ✅ avoid manual normalize
         )
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+    def build(self, docs: List[str], vectors: np.ndarray = None):
+        """Index docs; pass their vectors if they were already encoded"""
+        if not docs:
+            raise ValueError("Cannot build index from empty document list")
+
+        self.texts = docs
+        embeddings = self.encode(docs) if vectors is None else np.ascontiguousarray(vectors, dtype=np.float32)
 
         dim = embeddings.shape[1]
         self.index = faiss.IndexFlatIP(dim)
@@ -43,20 +73,14 @@ class EmbeddingsIndex:
         logger.info(f"FAISS index built with {len(docs)} documents")
 
 
-    def query(self, q: str, k: int = 3) -> List[Tuple[str, float]]:
+    def query(self, q: str, k: int = 3, q_vec: np.ndarray = None) -> List[Tuple[str, float]]:
         if self.index is None:
             raise RuntimeError("Index not built")
 
         if not q.strip():
             return []
 
-        model = self._get_model()
-
-        q_emb = model.encode(
-            [q],
-            convert_to_numpy=True,
-            normalize_embeddings=True
-        )
+        q_emb = self.encode([q]) if q_vec is None else np.asarray(q_vec, dtype=np.float32).reshape(1, -1)
 
         k = min(k, len(self.texts))
         scores, indices = self.index.search(q_emb, k)
@@ -0,0 +1,160 @@
+"""Separately sized thread pools per kind of blocking work.
+
+Without these, bcrypt, pypdf, SentenceTransformer encode, SQLAlchemy and
+requests to Ollama all share anyio's default threadpool, so one kind of load
+can starve the others. Each pool is created lazily:
+
+    cpu       embedding / similarity work         EXECUTOR_CPU_WORKERS
+    parse     resume parsing (pypdf, docx)        EXECUTOR_PARSE_WORKERS
+    db        SQLAlchemy calls                    EXECUTOR_DB_WORKERS
+    llm       requests to Ollama (I/O wait)       EXECUTOR_LLM_WORKERS
+    auth      bcrypt hashing / verification       AUTH_HASH_WORKERS
+    pipeline  StageGraph stages with no pool      PIPELINE_WORKERS
+    request   async handlers' orchestration       EXECUTOR_REQUEST_WORKERS
+              (/analyze, /rewrite: waits on the pools above)
+
+A task must not submit to its own pool and wait on it: a full pool would
+deadlock.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from backend.app.config import Config
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZES = {
+    "cpu": lambda: Config.EXECUTOR_CPU_WORKERS,
+    "parse": lambda: Config.EXECUTOR_PARSE_WORKERS,
+    "db": lambda: Config.EXECUTOR_DB_WORKERS,
+    "llm": lambda: Config.EXECUTOR_LLM_WORKERS,
+    "auth": lambda: Config.AUTH_HASH_WORKERS,
+    "pipeline": lambda: Config.PIPELINE_WORKERS,
+    "request": lambda: Config.EXECUTOR_REQUEST_WORKERS,
+}
+
+_executors: Dict[str, "InstrumentedExecutor"] = {}
+_executors_lock = threading.Lock()
+_torch_threads = None
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that tracks queue length, active tasks and busy time"""
+
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.workers = max_workers
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.busy_s = 0.0
+        self.created = time.monotonic()
+        self._stats_lock = threading.Lock()
+
+    def _run(self, fn, args, kwargs):
+        with self._stats_lock:
+            self.queued -= 1
+            self.active += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.active -= 1
+                self.completed += 1
+                self.busy_s += elapsed
+
+    def _cancelled(self, fut):
+        if fut.cancelled():
+            with self._stats_lock:
+                self.queued -= 1
+
+    def submit(self, fn, *args, **kwargs):
+        with self._stats_lock:
+            self.queued += 1
+        fut = super().submit(self._run, fn, args, kwargs)
+        fut.add_done_callback(self._cancelled)
+        return fut
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            uptime = max(time.monotonic() - self.created, 1e-9)
+            return {
+                "workers": self.workers,
+                "active": self.active,
+                "queued": self.queued,
+                "completed": self.completed,
+                "utilization": round(self.active / self.workers, 3),
+                "busy_ratio": round(min(self.busy_s / (uptime * self.workers), 1.0), 3),
+            }
+
+
+def get_executor(name: str) -> InstrumentedExecutor:
+    ex = _executors.get(name)
+    if ex is None:
+        if name not in POOL_SIZES:
+            raise ValueError(f"Unknown executor: {name}")
+        with _executors_lock:
+            ex = _executors.get(name)
+            if ex is None:
+                ex = InstrumentedExecutor(name, max(1, POOL_SIZES[name]()))
+                _executors[name] = ex
+    return ex
+
+
+def run_in(name: str, fn, *args, wait_timeout: Optional[float] = None, **kwargs):
+    """Run fn on the named pool and wait for it (from a thread that isn't in that pool).
+
+    wait_timeout bounds queueing plus running; on expiry TimeoutError is
+    raised (fn still runs to completion, its result is dropped).
+    """
+    return get_executor(name).submit(fn, *args, **kwargs).result(timeout=wait_timeout)
+
+
+async def arun(name: str, fn, *args, wait_timeout: Optional[float] = None, **kwargs):
+    """Await fn running on the named pool without holding an event-loop or anyio thread.
+
+    wait_timeout works as in run_in.
+    """
+    fut = asyncio.wrap_future(get_executor(name).submit(fn, *args, **kwargs))
+    if wait_timeout is None:
+        return await fut
+    return await asyncio.wait_for(fut, wait_timeout)
+
+
+def executor_stats() -> dict:
+    stats = {name: ex.stats() for name, ex in sorted(_executors.items())}
+    if _torch_threads is not None:
+        stats["torch_threads"] = _torch_threads
+    return stats
+
+
+def configure_torch_threads(num_threads: Optional[int] = None) -> Optional[int]:
+    """Size torch's intra-op pool so web workers x cpu pool x torch threads ~= cores.
+
+    Uses TORCH_NUM_THREADS when set, else cores // (WEB_CONCURRENCY *
+    EXECUTOR_CPU_WORKERS). An explicit num_threads overrides an earlier
+    call; otherwise the first configuration sticks. Returns the count, or
+    None without torch.
+    """
+    global _torch_threads
+    if num_threads is None and _torch_threads is not None:
+        return _torch_threads
+    try:
+        import torch
+    except ImportError:
+        return None
+    n = num_threads or Config.TORCH_NUM_THREADS or max(
+        1, (os.cpu_count() or 1) // max(1, Config.WEB_CONCURRENCY * Config.EXECUTOR_CPU_WORKERS)
+    )
+    if n != _torch_threads:
+        torch.set_num_threads(n)
+        _torch_threads = n
+        logger.info(f"torch intra-op threads: {n}")
+    return n
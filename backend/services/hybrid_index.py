@@ -0,0 +1,90 @@
+import logging
+import numpy as np
+from typing import Dict, List, Tuple
+from .bm25_index import BM25Index
+from .embeddings_index import EmbeddingsIndex
+from backend.app.config import Config
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60
+
+
+class HybridIndex:
+    """Two-stage retrieval: BM25 picks candidates, the dense model reranks them.
+
+    Only the lexical top ``prefilter_k`` documents are ever encoded, so a
+    500-paragraph resume costs ~32 encodes per query instead of 500. When
+    every document is already encoded (vectors passed to build), there is
+    nothing to save: all of them are scored and fused.
+    Exposes the same build/query API as EmbeddingsIndex.
+    """
+
+    def __init__(self, model_name: str, prefilter_k: int = None, alpha: float = None, fusion: str = None):
+        self.dense = EmbeddingsIndex(model_name)
+        self.bm25 = BM25Index()
+        self.prefilter_k = prefilter_k or Config.HYBRID_PREFILTER_K
+        self.alpha = Config.HYBRID_ALPHA if alpha is None else alpha
+        self.fusion = fusion or Config.HYBRID_FUSION
+        if self.fusion not in ("weighted", "rrf"):
+            raise ValueError(f"Unknown fusion method: {self.fusion}")
+        self.texts: List[str] = []
+        self.encode_calls = 0  # number of texts sent to the encoder
+        self._vectors: Dict[int, np.ndarray] = {}
+
+    def build(self, docs: List[str], vectors: np.ndarray = None):
+        """Index docs; with their vectors already encoded, queries encode nothing but the query"""
+        if not docs:
+            raise ValueError("Cannot build index from empty document list")
+        self.texts = docs
+        self._vectors = {} if vectors is None else dict(enumerate(vectors))
+        self.bm25.build(docs)
+
+    def _dense_scores(self, q: str, ids: List[int], q_vec: np.ndarray = None) -> np.ndarray:
+        missing = [i for i in ids if i not in self._vectors]
+        to_encode = ([q] if q_vec is None else []) + [self.texts[i] for i in missing]
+        vecs = self.dense.encode(to_encode) if to_encode else []
+        self.encode_calls += len(to_encode)
+        if q_vec is None:
+            q_vec, vecs = vecs[0], vecs[1:]
+        for i, v in zip(missing, vecs):
+            self._vectors[i] = v
+        doc_vecs = np.stack([self._vectors[i] for i in ids])
+        return doc_vecs @ np.asarray(q_vec)
+
+    def _fuse(self, ids: List[int], lexical: List[float], dense: np.ndarray) -> List[float]:
+        if self.fusion == "rrf":
+            lex_rank = {i: r for r, i in enumerate(sorted(ids, key=lambda i: lexical[i], reverse=True))}
+            dense_rank = {ids[r]: n for n, r in enumerate(np.argsort(-dense))}
+            return [
+                self.alpha / (RRF_K + dense_rank[i] + 1) + (1 - self.alpha) / (RRF_K + lex_rank[i] + 1)
+                for i in ids
+            ]
+        lex = np.array([lexical[i] for i in ids])
+        top = lex.max()
+        lex = lex / top if top > 0 else lex
+        return list(self.alpha * dense + (1 - self.alpha) * lex)
+
+    def query(self, q: str, k: int = 3, q_vec: np.ndarray = None) -> List[Tuple[str, float]]:
+        if not self.texts:
+            raise RuntimeError("Index not built")
+
+        if not q.strip():
+            return []
+
+        lexical = self.bm25.scores(q)
+        if len(self._vectors) == len(self.texts):
+            # prefiltering would cost recall without saving an encode
+            ids = list(range(len(self.texts)))
+        else:
+            ids = self.bm25.top_ids(q, self.prefilter_k, lexical)
+        if not ids:
+            # No lexical overlap at all: fall back to dense-only so recall is kept
+            logger.info("BM25 found no candidates, falling back to dense retrieval")
+            ids = list(range(len(self.texts)))
+
+        dense = self._dense_scores(q, ids, q_vec)
+        fused = self._fuse(ids, lexical, dense)
+
+        ranked = sorted(zip(ids, fused), key=lambda x: x[1], reverse=True)[:k]
+        return [(self.texts[i], float(score)) for i, score in ranked]
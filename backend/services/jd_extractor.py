@@ -2,14 +2,14 @@ import json
 from .ollama_client import call_ollama
 from .ats_scoring import simple_keyword_extract
 
-def extract_keywords_llm(jd_text: str):
+def extract_keywords_llm(jd_text: str, timeout: float = None, cancel=None):
     prompt = (
         "Extract ATS-relevant keywords from the Job Description. "
         "Group into skills (technical), tools/frameworks, and soft_skills. "
         "Return ONLY strict JSON: {\"skills\":[], \"tools\":[], \"soft_skills\":[]}.\n\n"
         f"Job Description:\n{jd_text}\n"
     )
-    resp = call_ollama(prompt)
+    resp = call_ollama(prompt, timeout=timeout, max_retries=1 if timeout else 3, cancel=cancel)
     try:
         return json.loads(resp)
     except Exception:
@@ -0,0 +1,123 @@
+"""Precomputed JD artifacts and one-resume-to-many-postings matching.
+
+A posting's JD is processed once (keywords, requirement split, JD and
+requirement embeddings) and stored with the JD. Matching a resume then needs
+only the resume to be encoded: its similarity to every JD and its coverage of
+every posting's requirements come out of two matrix products.
+"""
+import json
+import logging
+import numpy as np
+from typing import List
+from .cache import LRUCache
+from .coverage import CoverageEngine, chunk_resume, coverage_matrix
+from .basic_analysis import jd_terms, keyword_match
+from .jd_extractor import extract_keywords_llm
+from backend.app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# (jd id, embedding model) -> decoded artifacts; JD rows never change text
+_artifact_cache = LRUCache(4096)
+
+
+def pack_vectors(vecs: np.ndarray) -> bytes:
+    return np.ascontiguousarray(vecs, dtype=np.float32).tobytes()
+
+
+def unpack_vectors(blob: bytes, dim: int) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32).reshape(-1, dim)
+
+
+def jd_keywords(jd: str, use_llm: bool = True, llm_timeout: float = None) -> dict:
+    """A JD's keywords from the LLM, or its plain terms when that fails.
+
+    With llm_timeout the keyword extraction is a single attempt bounded by it.
+    """
+    keywords = None
+    if use_llm:
+        try:
+            keywords = extract_keywords_llm(jd, timeout=llm_timeout)
+        except Exception as e:
+            logger.warning(f"LLM keyword extraction failed, using JD terms: {str(e)}")
+    if not isinstance(keywords, dict) or not keywords.get("skills"):
+        keywords = {"skills": jd_terms(jd), "tools": [], "soft_skills": []}
+    return keywords
+
+
+def encode_jd(jd: str) -> dict:
+    """A JD's requirements and the embeddings of the JD and each requirement"""
+    engine = CoverageEngine()
+    requirements, req_vecs = engine.encode_requirements(jd)
+    jd_vec = engine.encoder.encode([jd])
+    return {
+        "requirements": requirements,
+        "jd_vec": jd_vec[0],
+        "req_vecs": req_vecs,
+        "model": Config.EMBEDDING_MODEL,
+    }
+
+
+def compute_jd_artifacts(jd: str, use_llm: bool = True, llm_timeout: float = None) -> dict:
+    """Keywords, requirements and embeddings for one JD (the slow part, run once)"""
+    return dict(encode_jd(jd), keywords=jd_keywords(jd, use_llm, llm_timeout))
+
+
+def decode_artifacts(jd_id: int, row) -> dict:
+    """Artifacts of a JobDescription row as arrays (cached per JD and model)"""
+    key = (jd_id, row.embedding_model)
+    cached = _artifact_cache.get(key)
+    if cached is not None:
+        return cached
+    jd_vec = np.frombuffer(row.embedding, dtype=np.float32)
+    out = {
+        "keywords": json.loads(row.keywords),
+        "requirements": json.loads(row.requirements),
+        "jd_vec": jd_vec,
+        "req_vecs": unpack_vectors(row.requirement_embeddings, jd_vec.shape[0]),
+    }
+    _artifact_cache.put(key, out)
+    return out
+
+
+def match_postings(resume_text: str, postings: List[dict], batch_size: int = 64) -> List[dict]:
+    """Score one resume against many postings, best coverage first.
+
+    Each posting is a dict with "id", "title", "company" and its decoded
+    artifacts under "artifacts". The resume is encoded once (whole text and
+    chunks, in one call); scoring is one matrix product per measure.
+    """
+    if not postings:
+        return []
+    engine = CoverageEngine(batch_size=batch_size)
+    chunks = chunk_resume(resume_text)
+    vecs = engine.encoder.encode([resume_text] + chunks, batch_size=batch_size)
+    resume_vec, chunk_vecs = vecs[0], vecs[1:]
+
+    arts = [p["artifacts"] for p in postings]
+    jd_matrix = np.vstack([a["jd_vec"] for a in arts])
+    scores = jd_matrix @ resume_vec
+    req_counts = [len(a["requirements"]) for a in arts]
+    coverage, best_sim, _ = coverage_matrix(chunk_vecs, [len(chunks)], np.vstack([a["req_vecs"] for a in arts]),
+                                            req_counts)
+
+    results = []
+    start = 0
+    for i, (p, a) in enumerate(zip(postings, arts)):
+        n = req_counts[i]
+        covered = int((best_sim[0, start:start + n] >= Config.COVERAGE_HIGH).sum())
+        matched, missing = keyword_match(resume_text, "", a["keywords"])
+        results.append({
+            "posting_id": p["id"],
+            "title": p["title"],
+            "company": p.get("company"),
+            "score": round(float(scores[i]) * 100, 2),
+            "coverage": round(float(coverage[0, i]) * 100, 2),
+            "covered": covered,
+            "total": n,
+            "matched_keywords": matched,
+            "missing_keywords": missing,
+        })
+        start += n
+    results.sort(key=lambda r: (r["coverage"], r["score"]), reverse=True)
+    return results
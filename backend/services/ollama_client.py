@@ -1,51 +1,132 @@
 import requests
 import logging
 import time
+import threading
 from backend.app.config import settings
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
-def call_ollama(prompt: str, model: str = None, timeout: int = None, max_retries: int = 3) -> str:
+# Caps in-flight requests from this process; Ollama queues the rest anyway
+_llm_slots = threading.BoundedSemaphore(settings.LLM_CONCURRENCY)
+
+
+def _base_url() -> str:
+    return settings.OLLAMA_URL.split("/api/")[0].rstrip("/")
+
+
+def probe_ollama() -> bool:
+    """Cheap liveness check: the server answers without running the model"""
+    try:
+        resp = requests.get(_base_url() + "/api/version", timeout=settings.OLLAMA_PROBE_TIMEOUT)
+        return resp.ok
+    except requests.exceptions.RequestException:
+        return False
+
+
+breaker = CircuitBreaker(
+    "ollama",
+    failure_threshold=settings.OLLAMA_BREAKER_FAILURES,
+    reset_timeout=settings.OLLAMA_BREAKER_RESET_S,
+    probe=probe_ollama,
+    # the trial is a full generation: it may take as long as any call
+    trial_timeout=settings.OLLAMA_TIMEOUT,
+)
+
+
+def warm_model(model: str = None) -> bool:
+    """Ask Ollama to load the model (no prompt) and keep it for OLLAMA_KEEP_ALIVE"""
+    model = model or settings.OLLAMA_MODEL
+    try:
+        resp = requests.post(
+            _base_url() + "/api/generate",
+            json={"model": model, "keep_alive": settings.OLLAMA_KEEP_ALIVE},
+            timeout=settings.OLLAMA_TIMEOUT,
+        )
+        resp.raise_for_status()
+        logger.info(f"Ollama model '{model}' loaded (keep_alive={settings.OLLAMA_KEEP_ALIVE})")
+        return True
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Could not warm Ollama model '{model}': {str(e)}")
+        return False
+
+
+def call_ollama(prompt: str, model: str = None, timeout: int = None, max_retries: int = 3, format=None, num_predict: int = None,
+                cancel: threading.Event = None) -> str:
     """
     Call Ollama API with comprehensive error handling and retry logic
     
     Args:
         prompt: The input text prompt
         model: Ollama model name (default from settings)
-        timeout: Request timeout in seconds (default from settings)
+        timeout: Seconds per attempt, waiting for a free LLM slot included (default from settings)
         max_retries: Maximum number of retry attempts for timeouts (default: 3)
+        format: Ollama structured output, "json" or a JSON schema dict (optional)
+        num_predict: Max generated tokens (default from settings)
+        cancel: When set (e.g. the caller's deadline passed), no further attempt is sent (optional)
     
     Returns:
         str: LLM response text
     """
-    model = settings.OLLAMA_MODEL
-    timeout = settings.OLLAMA_TIMEOUT
+    model = model or settings.OLLAMA_MODEL
+    timeout = timeout or settings.OLLAMA_TIMEOUT
     
     if not prompt or not prompt.strip():
         raise ValueError("Prompt cannot be empty")
     
+    if cancel is not None and cancel.is_set():
+        raise TimeoutError("LLM call cancelled: the caller no longer needs it")
+    
+    if not breaker.allow():
+        raise CircuitOpenError(
+            f"LLM service at {settings.OLLAMA_URL} is unavailable "
+            f"(circuit open after {breaker.failures} consecutive failures)"
+        )
+    # the half-open trial call: if it gives up unsent, the next caller probes instead
+    trial = breaker.state == "half_open"
+    
     payload = {
         "model": model,
         "prompt": prompt,
         "stream": False,
+        "keep_alive": settings.OLLAMA_KEEP_ALIVE,
         "options": {
             "temperature": 0.4,
-            "num_predict": 400
+            "num_predict": num_predict or settings.OLLAMA_NUM_PREDICT,
+            "num_ctx": settings.OLLAMA_NUM_CTX
         }
     }
+    if format is not None:
+        payload["format"] = format
     
     last_error = None
     
     for attempt in range(max_retries):
+        attempt_deadline = time.monotonic() + timeout
+        # an abandoned caller's call must not queue up and then run a full generation
+        if not _llm_slots.acquire(timeout=timeout):
+            if trial:
+                breaker.release_trial()
+            raise TimeoutError(f"No free LLM slot within {timeout}s ({settings.LLM_CONCURRENCY} calls in flight)")
+        if cancel is not None and cancel.is_set():
+            _llm_slots.release()
+            if trial:
+                breaker.release_trial()
+            raise TimeoutError("LLM call cancelled: the caller no longer needs it")
+        
         try:
             logger.info(f"Calling Ollama (attempt {attempt + 1}/{max_retries}) with model: {model}")
             
-            resp = requests.post(
-                settings.OLLAMA_URL,
-                json=payload, 
-                timeout=timeout
-            )
+            try:
+                resp = requests.post(
+                    settings.OLLAMA_URL,
+                    json=payload, 
+                    timeout=max(attempt_deadline - time.monotonic(), 1)
+                )
+            finally:
+                _llm_slots.release()
             resp.raise_for_status()
+            breaker.record_success()
             
             data = resp.json()
             response_text = data.get("response", "")
@@ -59,23 +140,25 @@ def call_ollama(prompt: str, model: str = None, timeout: int = None, max_retries
             
         except requests.exceptions.Timeout as e:
             last_error = e
+            breaker.record_failure()
             logger.warning(f"Ollama request timeout (attempt {attempt + 1}/{max_retries})")
             
-            # If model is loading first time, wait a bit and retry
-            if attempt < max_retries - 1:
+            # If model is loading first time, wait a bit and retry (unless the breaker tripped)
+            if attempt < max_retries - 1 and breaker.state == "closed":
                 wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
                 logger.info(f"Waiting {wait_time}s before retry (model may be loading)...")
                 time.sleep(wait_time)
                 continue
             
-            logger.error(f"Ollama request timeout after {max_retries} attempts")
+            logger.error(f"Ollama request timeout after {attempt + 1} attempts")
             raise TimeoutError(
-                f"LLM request timed out after {max_retries} attempts. "
+                f"LLM request timed out after {attempt + 1} attempts. "
                 f"Model '{model}' may be too large or system resources limited. "
                 f"Try a smaller model like 'gemma2:2b' or increase OLLAMA_TIMEOUT."
             )
         
         except requests.exceptions.ConnectionError as e:
+            breaker.record_failure()
             logger.error(f"Cannot connect to Ollama at {settings.OLLAMA_URL}")
             raise ConnectionError(
                 f"Cannot connect to LLM service at {settings.OLLAMA_URL}. "
@@ -84,6 +167,10 @@ def call_ollama(prompt: str, model: str = None, timeout: int = None, max_retries
         
         except requests.exceptions.HTTPError as e:
             logger.error(f"HTTP error from Ollama: {e}")
+            if e.response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()  # the server is up, the request was bad
             
             if e.response.status_code == 404:
                 raise ValueError(
@@ -100,6 +187,7 @@ def call_ollama(prompt: str, model: str = None, timeout: int = None, max_retries
                 raise ValueError(f"LLM service error: HTTP {e.response.status_code}")
         
         except requests.exceptions.RequestException as e:
+            breaker.record_failure()
             logger.error(f"Request error: {str(e)}")
             raise ConnectionError(f"Error communicating with LLM service: {str(e)}")
         
@@ -107,6 +195,7 @@ def call_ollama(prompt: str, model: str = None, timeout: int = None, max_retries
             raise
         
         except Exception as e:
+            breaker.record_failure()
             logger.error(f"Unexpected error calling Ollama: {str(e)}")
             raise RuntimeError(f"Unexpected error with LLM service: {str(e)}")
     
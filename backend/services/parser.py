@@ -70,19 +70,31 @@ def parse_upload(upload_file) -> str:
         if not content:
             raise ValueError("File is empty")
         
-        name = upload_file.filename.lower()
-        
-        if name.endswith(".pdf"):
-            return parse_pdf_bytes(content)
-        elif name.endswith(".docx"):
-            return parse_docx_bytes(content)
-        elif name.endswith((".txt", ".text")):
-            return parse_text_bytes(content)
-        else:
-            # Try text parsing as fallback
-            logger.warning(f"Unknown file type: {name}, attempting text parse")
-            return parse_text_bytes(content)
+        return parse_bytes(upload_file.filename, content)
             
     except Exception as e:
         logger.error(f"Error in parse_upload: {str(e)}")
         raise
+
+def parse_bytes(filename: str, content: bytes) -> str:
+    """Parse file content, picking the parser from the filename extension"""
+    name = filename.lower()
+    
+    if name.endswith(".pdf"):
+        return parse_pdf_bytes(content)
+    elif name.endswith(".docx"):
+        return parse_docx_bytes(content)
+    elif name.endswith((".txt", ".text")):
+        return parse_text_bytes(content)
+    else:
+        # Try text parsing as fallback
+        logger.warning(f"Unknown file type: {name}, attempting text parse")
+        return parse_text_bytes(content)
+
+def parse_path(path: str) -> str:
+    """Parse a resume file from disk"""
+    with open(path, "rb") as fh:
+        content = fh.read()
+    if not content:
+        raise ValueError("File is empty")
+    return parse_bytes(path, content)
@@ -0,0 +1,134 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, List, Optional
+from . import executors
+
+logger = logging.getLogger(__name__)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Default pool for stages that don't name one"""
+    return executors.get_executor("pipeline")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class StageFailed(RuntimeError):
+    def __init__(self, stage: str, cause: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {cause}")
+        self.stage = stage
+        self.cause = cause
+
+
+class _Stage:
+    def __init__(self, fn, deps, critical, default, pool):
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.critical = critical
+        self.default = default
+        self.pool = pool
+
+
+class StageGraph:
+    """Run dependent stages concurrently, each as soon as its inputs are ready.
+
+    A stage function receives the results of its deps positionally. A
+    non-critical stage that raises yields its default instead; a critical
+    one cancels every stage that has not started and raises. When the
+    deadline passes and only non-critical stages are unfinished, they are
+    abandoned with their defaults (listed in ``graph.skipped``); otherwise
+    it raises DeadlineExceeded. Stages already running can't be
+    interrupted, but they may poll ``graph.cancelled`` or budget their own
+    work with ``graph.remaining()``. A stage given ``pool`` runs on that
+    named executor (services/executors.py) instead of the graph's own.
+    ``deadline`` is seconds from now; ``deadline_at`` an absolute
+    time.monotonic() (for a budget that started before the graph).
+    """
+
+    def __init__(self, deadline: Optional[float] = None, executor: ThreadPoolExecutor = None,
+                 deadline_at: Optional[float] = None):
+        self._stages: Dict[str, _Stage] = {}
+        self._executor = executor or get_executor()
+        if deadline_at is not None:
+            self.deadline = deadline_at
+        else:
+            self.deadline = time.monotonic() + deadline if deadline else None
+        self.cancelled = threading.Event()
+        self.timings: Dict[str, float] = {}
+        self.skipped: List[str] = []
+
+    def add(self, name: str, fn: Callable, deps: Iterable[str] = (), critical: bool = True, default=None,
+            pool: str = None):
+        for d in deps:
+            if d not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{d}'")
+        self._stages[name] = _Stage(fn, deps, critical, default, pool)
+        return self
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None if there is no deadline)"""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def _timed(self, name, fn, args):
+        if self.cancelled.is_set():
+            raise RuntimeError("cancelled")
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 3)
+
+    def run(self) -> dict:
+        results = {}
+        waiting = dict(self._stages)
+        pending = {}
+
+        def submit_ready():
+            for name, stage in list(waiting.items()):
+                if all(d in results for d in stage.deps):
+                    del waiting[name]
+                    args = [results[d] for d in stage.deps]
+                    executor = executors.get_executor(stage.pool) if stage.pool else self._executor
+                    pending[executor.submit(self._timed, name, stage.fn, args)] = name
+
+        try:
+            submit_ready()
+            while pending:
+                done, _ = wait(list(pending), timeout=self.remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    unfinished = list(pending.values()) + list(waiting)
+                    if any(self._stages[n].critical for n in unfinished):
+                        raise DeadlineExceeded(f"Deadline exceeded waiting for: {', '.join(pending.values())}")
+                    logger.warning(f"Deadline reached, using defaults for: {', '.join(unfinished)}")
+                    self.cancelled.set()
+                    for f in pending:
+                        f.cancel()
+                    for n in unfinished:
+                        results[n] = self._stages[n].default
+                    self.skipped = unfinished
+                    break
+                for f in done:
+                    name = pending.pop(f)
+                    stage = self._stages[name]
+                    try:
+                        results[name] = f.result()
+                    except Exception as e:
+                        if stage.critical:
+                            raise StageFailed(name, e) from e
+                        logger.warning(f"Stage '{name}' failed, using default: {str(e)}")
+                        results[name] = stage.default
+                submit_ready()
+        except BaseException:
+            self.cancelled.set()
+            for f in pending:
+                f.cancel()
+            raise
+
+        logger.info(f"Stage timings: {self.timings}")
+        return results
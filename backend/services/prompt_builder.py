@@ -0,0 +1,174 @@
+import re
+import math
+import logging
+from typing import List, Tuple
+from .bm25_index import BM25Index
+from backend.app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Rough average for English text with llama/qwen style BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+# Headings of sections that are boilerplate as a whole ("Benefits:", "About us")
+_BOILERPLATE_HEADING = re.compile(
+    r"\bbenefits\b|\bperks\b|what we offer|why join us|about (us|the company)|"
+    r"equal (employment )?opportunity|\beeo\b",
+    re.IGNORECASE,
+)
+# Lines that are boilerplate on their own: full EEO / benefits phrases, not
+# single words (a requirement may mention dental work or disabilities)
+_BOILERPLATE_LINE = re.compile(
+    r"equal (employment )?opportunity employer|affirmative action employer|"
+    r"without regard to (race|color|religion|sex|gender|age|national origin|sexual orientation|veteran|disabilit)|"
+    r"request (a )?reasonable accommodation|"
+    r"^\W*(we offer|what we offer|benefits( include)?|perks)\b\s*:?",
+    re.IGNORECASE,
+)
+
+ANALYSIS_HEADER = "You are an ATS resume evaluator. Using the context and job description, provide concise analysis.\n\n"
+REWRITE_HEADER = (
+    "You are an expert resume writer. Rewrite the resume content to be ATS-optimized for the given Job Description. "
+    "Do NOT invent any new experience or skills. Use bullet points and metrics when possible. "
+    "Return JSON: {\"summary\": \"...\", \"experience\": [...], \"skills\": [...]}.\n\n"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; no tokenizer round-trip to Ollama needed"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, preferring a whitespace boundary"""
+    limit = max(max_tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return cut[:space] if space > limit // 2 else cut
+
+
+def strip_jd_boilerplate(jd: str) -> str:
+    """Drop benefits / EEO / company blurb sections and statements from a job description.
+
+    A boilerplate heading (e.g. "Benefits:") drops the lines under it until
+    the next blank line or heading; elsewhere only lines with a full
+    boilerplate phrase (an EEO statement, "We offer ...") are dropped.
+    Returns the original text if everything would be removed.
+    """
+    kept = []
+    skipping = False
+    for line in jd.splitlines():
+        stripped = line.strip()
+        is_heading = bool(stripped) and len(stripped.split()) <= 6 and (
+            stripped.endswith(":") or stripped.isupper() or stripped.startswith("#")
+        )
+        if not stripped or is_heading:
+            skipping = False
+        if is_heading and _BOILERPLATE_HEADING.search(stripped):
+            skipping = True
+            continue
+        if _BOILERPLATE_LINE.search(stripped):
+            continue
+        if skipping:
+            continue
+        kept.append(line)
+
+    result = re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+    return result or jd
+
+
+def _clamp_budget(budget: int, num_predict: int = None) -> int:
+    """Prompt plus generation must fit num_ctx or Ollama silently truncates"""
+    num_predict = num_predict or Config.OLLAMA_NUM_PREDICT
+    return max(min(budget, Config.OLLAMA_NUM_CTX - num_predict), 64)
+
+
+def _fit(header: str, jd: str, chunks: List[str], budget: int) -> Tuple[str, List[str]]:
+    """Choose the JD text and resume chunks that fit in budget tokens.
+
+    chunks must be ordered most relevant first; the tail is dropped before
+    the JD is truncated.
+    """
+    available = budget - estimate_tokens(header) - 16  # section labels
+    jd_tokens = estimate_tokens(jd)
+
+    kept = []
+    used = jd_tokens
+    for c in chunks:
+        t = estimate_tokens(c) + 1
+        if used + t > available:
+            break
+        kept.append(c)
+        used += t
+
+    if not kept and chunks:
+        # Even the best chunk doesn't fit next to the full JD: split the budget
+        jd = truncate_to_tokens(jd, max(available // 2, available - estimate_tokens(chunks[0])))
+        kept = [truncate_to_tokens(chunks[0], available - estimate_tokens(jd))]
+    elif used > available:
+        jd = truncate_to_tokens(jd, available)
+
+    return jd, kept
+
+
+def build_analysis_prompt(
+    context_chunks: List[str], jd: str, budget: int = None,
+    header: str = ANALYSIS_HEADER, num_predict: int = None,
+) -> Tuple[str, int]:
+    """Analysis prompt within budget tokens; returns (prompt, estimated_tokens)"""
+    budget = _clamp_budget(budget or Config.PROMPT_BUDGET_ANALYZE, num_predict)
+    jd = strip_jd_boilerplate(jd)
+    jd, kept = _fit(header, jd, context_chunks, budget)
+    context_text = "\n\n".join(kept)
+    prompt = f"{header}Context:\n{context_text}\n\nJob Description:\n{jd}\n"
+    tokens = estimate_tokens(prompt)
+    if len(kept) < len(context_chunks):
+        logger.info(f"Analysis prompt trimmed to {len(kept)}/{len(context_chunks)} context chunks")
+    return prompt, tokens
+
+
+def build_rewrite_prompt(resume_text: str, jd: str, budget: int = None, num_predict: int = None) -> Tuple[str, int]:
+    """Rewrite prompt within budget tokens; returns (prompt, estimated_tokens).
+
+    Resume paragraphs are ranked against the JD with BM25 so the least
+    relevant ones go first, but kept paragraphs stay in their original order.
+    """
+    budget = _clamp_budget(budget or Config.PROMPT_BUDGET_REWRITE, num_predict)
+    jd = strip_jd_boilerplate(jd)
+    paras = [p for p in resume_text.split("\n\n") if p.strip()] or [resume_text]
+
+    bm25 = BM25Index()
+    bm25.build(paras)
+    scores = bm25.scores(jd)
+    ranked = sorted(range(len(paras)), key=lambda i: scores[i], reverse=True)
+
+    jd, kept = _fit(REWRITE_HEADER, jd, [paras[i] for i in ranked], budget)
+    kept_set = set(kept)
+    ordered = [p for p in paras if p in kept_set]
+    if len(ordered) < len(kept):
+        # the best paragraph was truncated to fit
+        ordered = kept
+    prompt = f"{REWRITE_HEADER}JOB DESCRIPTION:\n{jd}\n\nRESUME:\n" + "\n\n".join(ordered) + "\n"
+    tokens = estimate_tokens(prompt)
+    if len(ordered) < len(paras):
+        logger.info(f"Rewrite prompt trimmed to {len(ordered)}/{len(paras)} resume paragraphs")
+    return prompt, tokens
+
+
+def build_section_prompt(header: str, section_text: str, jd: str, budget: int = None,
+                         num_predict: int = None) -> Tuple[str, int]:
+    """Prompt for rewriting one resume section; returns (prompt, estimated_tokens)"""
+    budget = _clamp_budget(budget or Config.PROMPT_BUDGET_REWRITE, num_predict)
+    jd = strip_jd_boilerplate(jd)
+    jd, kept = _fit(header, jd, [section_text], budget)
+    prompt = f"{header}JOB DESCRIPTION:\n{jd}\n\nSECTION:\n{kept[0]}\n"
+    return prompt, estimate_tokens(prompt)
+
+
+def max_latency_tokens(prompt_tokens: int, num_predict: int = None) -> int:
+    """Worst-case tokens processed by one call: prompt eval plus generation"""
+    return prompt_tokens + (num_predict or Config.OLLAMA_NUM_PREDICT)
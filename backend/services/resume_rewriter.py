@@ -1,15 +1,219 @@
 from .ollama_client import call_ollama
+from .prompt_builder import build_rewrite_prompt, build_section_prompt
+from .executors import get_executor
+from .cache import LRUCache
+from backend.app.config import Config
+import hashlib
+import json
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "objective", "about me"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "work history"),
+    "skills": ("skills", "technical skills", "core competencies", "technologies"),
+}
+
+_RULES = "Do NOT invent any new experience or skills. Use bullet points and metrics when possible. "
+SECTION_HEADERS = {
+    "summary": (
+        "You are an expert resume writer. Rewrite this resume summary to be ATS-optimized for the given Job Description. "
+        + _RULES + "Return ONLY the rewritten summary text.\n\n"
+    ),
+    "job": (
+        "You are an expert resume writer. Rewrite this single job entry to be ATS-optimized for the given Job Description. "
+        "Keep the title, company and dates. " + _RULES + "Return ONLY the rewritten entry text.\n\n"
+    ),
+    "skills": (
+        "You are an expert resume writer. Reorder and phrase these skills to be ATS-optimized for the given Job Description. "
+        "Do NOT add skills that are not listed. Return ONLY JSON: {\"skills\": [...]}.\n\n"
+    ),
+}
+
+# A job entry starts at a short, non-bullet line carrying a date ("2019 - Present")
+_DATE = re.compile(r"\b(?:19|20)\d{2}\b|\b(?:present|current)\b", re.IGNORECASE)
+_BULLET = re.compile(r"^\s*(?:[-•*▪◦‣]|\d+[.)])\s")
+
+
+def _num_predict(kind: str) -> int:
+    return {
+        "summary": Config.REWRITE_NUM_PREDICT_SUMMARY,
+        "job": Config.REWRITE_NUM_PREDICT_JOB,
+        "skills": Config.REWRITE_NUM_PREDICT_SKILLS,
+    }[kind]
+
+
+# (section hash, JD hash, model) -> rewritten section
+_section_cache = LRUCache(Config.REWRITE_CACHE_SIZE)
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _heading_kind(line: str):
+    """Section kind for a heading line, "other" for unknown headings, None for body text"""
+    s = line.strip().strip("#").strip().rstrip(":").strip()
+    if not s or len(s.split()) > 4:
+        return None
+    low = s.lower()
+    for kind, names in SECTION_HEADINGS.items():
+        if low in names:
+            return kind
+    if line.strip().endswith(":") or (s.isupper() and len(s) > 3):
+        return "other"
+    return None
+
+
+def _is_entry_line(line: str) -> bool:
+    """Short non-bullet line that could be part of a job header (title, company, dates)"""
+    s = line.strip()
+    return bool(s) and not _BULLET.match(line) and len(s.split()) <= 12 and not s.endswith(".")
+
+
+def split_jobs(text: str):
+    """Split an experience section into job entries at their header lines.
+
+    A header is an entry line with a date, plus the entry lines directly
+    above it (title and company on lines of their own). Blank lines and
+    bullet groups inside an entry don't split it; without any dated header
+    the whole section is one entry.
+    """
+    lines = text.splitlines()
+    starts = []
+    for i, line in enumerate(lines):
+        if not (_is_entry_line(line) and _DATE.search(line)):
+            continue
+        start = i
+        while start > 0 and _is_entry_line(lines[start - 1]):
+            start -= 1
+        if not starts or start > starts[-1]:
+            starts.append(start)
+    if not starts:
+        return [text.strip()]
+    # anything before the first header belongs to the first entry
+    bounds = [0] + starts[1:] + [len(lines)]
+    entries = ["\n".join(lines[a:b]).strip() for a, b in zip(bounds, bounds[1:])]
+    return [e for e in entries if e]
+
+
+def split_sections(resume_text: str):
+    """Split a resume into rewrite units: summary, one unit per job, skills.
+
+    Returns a list of {"kind", "title", "text"} in document order, or [] if
+    no section headings were recognised. Text before the first heading
+    (name, contact details) and unknown sections come back as kind "other"
+    and are passed through unchanged.
+    """
+    sections = []
+    kind, title, lines = "other", "", []
+
+    def flush():
+        text = "\n".join(lines).strip()
+        if not text:
+            return
+        if kind == "experience":
+            for entry in split_jobs(text):
+                sections.append({"kind": "job", "title": title, "text": entry})
+        else:
+            sections.append({"kind": kind, "title": title, "text": text})
+
+    for line in resume_text.splitlines():
+        heading = _heading_kind(line)
+        if heading:
+            flush()
+            kind, title, lines = heading, line.strip().strip("#").strip().rstrip(":"), []
+        else:
+            lines.append(line)
+    flush()
+
+    if not any(s["kind"] != "other" for s in sections):
+        return []
+    return sections
+
+
+def _parse_skills(resp: str):
+    try:
+        skills = json.loads(resp).get("skills")
+        if isinstance(skills, list):
+            return [str(s).strip() for s in skills if str(s).strip()]
+    except Exception:
+        pass
+    return [s.strip(" -•*\t") for s in re.split(r"[,\n]", resp) if s.strip(" -•*\t")]
+
+
+def _rewrite_section(section: dict, jd_text: str, jd_hash: str):
+    key = (_sha(section["kind"] + "\0" + section["text"]), jd_hash, Config.OLLAMA_MODEL)
+    cached = _section_cache.get(key)
+    if cached is not None:
+        return cached
+
+    num_predict = _num_predict(section["kind"])
+    prompt, prompt_tokens = build_section_prompt(SECTION_HEADERS[section["kind"]], section["text"], jd_text,
+                                                 num_predict=num_predict)
+    logger.info(f"Rewriting {section['kind']} section (~{prompt_tokens} prompt tokens)")
+    if section["kind"] == "skills":
+        result = _parse_skills(call_ollama(prompt, format="json", num_predict=num_predict))
+    else:
+        result = call_ollama(prompt, num_predict=num_predict).strip()
+
+    _section_cache.put(key, result)
+    return result
+
+
+def rewrite_resume_sections(resume_text: str, jd_text: str):
+    """Map-reduce rewrite: each section is its own (cached) LLM call.
+
+    Sections run concurrently, bounded by LLM_CONCURRENCY inside
+    call_ollama. A section whose call fails keeps its original text; if
+    every call fails the first error is raised. Returns None when the
+    resume has no recognisable sections.
+    """
+    sections = split_sections(resume_text)
+    targets = [s for s in sections if s["kind"] in SECTION_HEADERS]
+    if not targets:
+        return None
+
+    jd_hash = _sha(jd_text)
+    futures = [get_executor("llm").submit(_rewrite_section, s, jd_text, jd_hash) for s in targets]
+
+    out = {"summary": "", "experience": [], "skills": [], "other": []}
+    errors = []
+    results = iter(futures)
+    for s in sections:
+        if s["kind"] not in SECTION_HEADERS:
+            out["other"].append({"title": s["title"], "text": s["text"]})
+            continue
+        try:
+            value = next(results).result()
+        except Exception as e:
+            logger.warning(f"Rewrite of {s['kind']} section failed, keeping original: {str(e)}")
+            errors.append(e)
+            value = s["text"].splitlines() if s["kind"] == "skills" else s["text"]
+        if s["kind"] == "summary":
+            out["summary"] = "\n\n".join(filter(None, [out["summary"], value]))
+        elif s["kind"] == "job":
+            out["experience"].append(value)
+        else:
+            out["skills"].extend(value)
+
+    if len(errors) == len(targets):
+        raise errors[0]
+    return out
+
 
 def rewrite_resume_ats(resume_text: str, jd_text: str):
-    prompt = (
-        "You are an expert resume writer. Rewrite the resume content to be ATS-optimized for the given Job Description. "
-        "Do NOT invent any new experience or skills. Use bullet points and metrics when possible. "
-        "Return JSON: {\"summary\": \"...\", \"experience\": [...], \"skills\": [...]}.\n\n"
-        f"JOB DESCRIPTION:\n{jd_text}\n\nRESUME:\n{resume_text}\n"
-    )
-    resp = call_ollama(prompt)
+    if Config.REWRITE_MODE == "sections":
+        out = rewrite_resume_sections(resume_text, jd_text)
+        if out is not None:
+            return out
+
+    prompt, prompt_tokens = build_rewrite_prompt(resume_text, jd_text, num_predict=Config.REWRITE_NUM_PREDICT_WHOLE)
+    logger.info(f"Rewrite prompt ~{prompt_tokens} tokens")
+    resp = call_ollama(prompt, num_predict=Config.REWRITE_NUM_PREDICT_WHOLE)
     # try parse; if not JSON, return as text
-    import json
     try:
         return json.loads(resp)
     except Exception:
@@ -0,0 +1,42 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable, Tuple
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs fn; callers arriving while it is in
+    flight wait for and share its result (or exception). Nothing is kept
+    once the call finishes: later reuse is the caller's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, fn: Callable, timeout: float = None) -> Tuple[object, bool]:
+        """Returns (result, shared); shared is True for callers that only waited"""
+        with self._lock:
+            fut = self._calls.get(key)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._calls[key] = fut
+        if not owner:
+            return fut.result(timeout=timeout), True
+
+        try:
+            result = fn()
+            fut.set_result(result)
+            return result, False
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,116 @@
+import json
+import logging
+import threading
+from typing import List
+from .ollama_client import call_ollama
+from .prompt_builder import build_analysis_prompt
+from backend.app.config import Config
+
+logger = logging.getLogger(__name__)
+
+GAP_STATUSES = ("met", "partial", "missing")
+KEYWORD_GROUPS = ("skills", "tools", "soft_skills")
+
+# Passed to Ollama as `format` so generation is constrained to this shape
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "keywords": {
+            "type": "object",
+            "properties": {g: {"type": "array", "items": {"type": "string"}} for g in KEYWORD_GROUPS},
+            "required": list(KEYWORD_GROUPS),
+        },
+        "gaps": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "requirement": {"type": "string"},
+                    "status": {"type": "string", "enum": list(GAP_STATUSES)},
+                    "evidence": {"type": "string"},
+                },
+                "required": ["requirement", "status"],
+            },
+        },
+        "narrative": {"type": "string"},
+    },
+    "required": ["keywords", "gaps", "narrative"],
+}
+
+STRUCTURED_HEADER = (
+    "You are an ATS resume evaluator. Using the resume context and job description:\n"
+    "1. Extract ATS-relevant keywords from the Job Description, grouped into skills (technical), "
+    "tools/frameworks and soft_skills.\n"
+    "2. List the key requirements with status met, partial or missing and short evidence from the resume.\n"
+    "3. Write a concise narrative analysis.\n"
+    "Return ONLY JSON: {\"keywords\": {\"skills\":[], \"tools\":[], \"soft_skills\":[]}, "
+    "\"gaps\": [{\"requirement\": \"\", \"status\": \"met|partial|missing\", \"evidence\": \"\"}], "
+    "\"narrative\": \"\"}.\n\n"
+)
+
+
+class StructuredOutputError(ValueError):
+    """The LLM answered, but its output isn't a usable structured analysis"""
+
+
+def _str_list(value, field: str) -> List[str]:
+    if not isinstance(value, list):
+        raise StructuredOutputError(f"{field} must be a list")
+    return [str(v).strip() for v in value if isinstance(v, (str, int, float)) and str(v).strip()]
+
+
+def validate_analysis(data) -> dict:
+    """Check a structured analysis against ANALYSIS_SCHEMA and normalize it.
+
+    Raises StructuredOutputError when the output can't be used, so the
+    caller can fall back to the two-call path.
+    """
+    if not isinstance(data, dict):
+        raise StructuredOutputError("Analysis must be a JSON object")
+
+    keywords = data.get("keywords")
+    if not isinstance(keywords, dict):
+        raise StructuredOutputError("keywords must be an object")
+    keywords = {g: _str_list(keywords.get(g, []), f"keywords.{g}") for g in KEYWORD_GROUPS}
+
+    gaps = []
+    for gap in data.get("gaps") or []:
+        if not isinstance(gap, dict) or not str(gap.get("requirement", "")).strip():
+            raise StructuredOutputError("each gap needs a requirement")
+        status = str(gap.get("status", "")).lower().strip()
+        if status not in GAP_STATUSES:
+            raise StructuredOutputError(f"invalid gap status: {status!r}")
+        gaps.append({
+            "requirement": str(gap["requirement"]).strip(),
+            "status": status,
+            "evidence": str(gap.get("evidence") or "").strip(),
+        })
+
+    narrative = data.get("narrative")
+    if not isinstance(narrative, str) or not narrative.strip():
+        raise StructuredOutputError("narrative must be a non-empty string")
+
+    return {"keywords": keywords, "gaps": gaps, "narrative": narrative.strip()}
+
+
+def analyze_structured(context_chunks: List[str], jd: str, timeout: float = None,
+                       cancel: threading.Event = None) -> dict:
+    """Keywords, gap analysis and narrative from a single LLM call.
+
+    Returns {"keywords", "gaps", "narrative", "prompt_tokens"}. LLM errors
+    propagate from call_ollama; unusable output raises StructuredOutputError.
+    With a timeout (the caller's remaining budget) the call is made once,
+    without retries; cancel is passed on to call_ollama.
+    """
+    prompt, prompt_tokens = build_analysis_prompt(
+        context_chunks, jd, header=STRUCTURED_HEADER, num_predict=Config.ANALYZE_NUM_PREDICT
+    )
+    resp = call_ollama(prompt, format=ANALYSIS_SCHEMA, num_predict=Config.ANALYZE_NUM_PREDICT,
+                       timeout=timeout, max_retries=1 if timeout else 3, cancel=cancel)
+    try:
+        data = json.loads(resp)
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Structured analysis is not valid JSON: {e}")
+    result = validate_analysis(data)
+    result["prompt_tokens"] = prompt_tokens
+    return result
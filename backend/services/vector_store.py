@@ -0,0 +1,288 @@
+import os
+import json
+import fcntl
+import logging
+import numpy as np
+from contextlib import contextmanager
+from typing import Iterable, List, Tuple
+from .embeddings_index import EmbeddingsIndex
+from backend.app.config import Config
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+LOCK = ".lock"
+
+
+class MmapVectorStore:
+    """Append-only, memory-mapped vector store shared by all worker processes.
+
+    Layout of ``path``::
+
+        manifest.json        dim, dtype, segments [{name, rows}], tombstone file, generation
+        seg-000001.vec       rows x dim matrix (float32 or float16), raw bytes
+        seg-000001.ids       rows int64 external ids (the id map)
+        tomb-000001.ids      deleted ids, int64, append-only
+
+    Readers only trust the row counts in the manifest, which is replaced
+    atomically, so a half-written append is never visible. Segment files are
+    opened with np.memmap read-only and scanned in fixed-size blocks, so a
+    worker's private memory stays flat while the data itself lives in the OS
+    page cache, shared between processes. Ids must not be reused after they
+    are deleted.
+    """
+
+    def __init__(self, path: str, dim: int = None, dtype: str = None,
+                 encoder: EmbeddingsIndex = None, segment_rows: int = None, block_rows: int = 4096):
+        self.path = path
+        self.encoder = encoder
+        self.segment_rows = segment_rows or Config.VECTOR_STORE_SEGMENT_ROWS
+        self.block_rows = block_rows
+        os.makedirs(path, exist_ok=True)
+
+        self._manifest_mtime = None
+        self.manifest = None
+        self._maps = {}
+        self._tombstones = np.empty(0, dtype=np.int64)
+        self._dead_rows = None
+        if os.path.exists(self._file(MANIFEST)):
+            self._refresh()
+        else:
+            if not dim:
+                raise ValueError("dim is required to create a new vector store")
+            dtype = dtype or Config.VECTOR_STORE_DTYPE
+            if dtype not in ("float32", "float16"):
+                raise ValueError(f"Unsupported dtype: {dtype}")
+            with self._locked():
+                if not os.path.exists(self._file(MANIFEST)):
+                    self._write_manifest({"dim": dim, "dtype": dtype, "segments": [], "next_seg": 1,
+                                          "generation": 1, "tomb_file": "tomb-000001.ids", "tomb_count": 0})
+            self._refresh()
+
+    # -- files / manifest -------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive writer lock across processes"""
+        with open(self._file(LOCK), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _write_manifest(self, manifest: dict):
+        tmp = self._file(MANIFEST + ".tmp")
+        with open(tmp, "w") as fh:
+            json.dump(manifest, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self._file(MANIFEST))
+
+    def _refresh(self, force: bool = False):
+        """Reload the manifest if another process changed it"""
+        mtime = os.stat(self._file(MANIFEST)).st_mtime_ns
+        if not force and mtime == self._manifest_mtime:
+            return
+        with open(self._file(MANIFEST)) as fh:
+            self.manifest = json.load(fh)
+        self._manifest_mtime = mtime
+        self._maps = {}
+        self._dead_rows = None
+
+        n = self.manifest["tomb_count"]
+        tomb_path = self._file(self.manifest["tomb_file"])
+        if n and os.path.exists(tomb_path):
+            self._tombstones = np.unique(np.fromfile(tomb_path, dtype=np.int64, count=n))
+        else:
+            self._tombstones = np.empty(0, dtype=np.int64)
+
+    @property
+    def dim(self) -> int:
+        return self.manifest["dim"]
+
+    @property
+    def dtype(self):
+        return np.dtype(self.manifest["dtype"])
+
+    def _segment_maps(self, seg: dict):
+        key = (seg["name"], seg["rows"])
+        if key not in self._maps:
+            rows = seg["rows"]
+            vecs = np.memmap(self._file(seg["name"] + ".vec"), dtype=self.dtype, mode="r", shape=(rows, self.dim))
+            ids = np.memmap(self._file(seg["name"] + ".ids"), dtype=np.int64, mode="r", shape=(rows,))
+            self._maps[key] = (vecs, ids)
+        return self._maps[key]
+
+    @staticmethod
+    def _append(path: str, valid_bytes: int, data: bytes):
+        # Drop bytes from an append that crashed before its manifest update
+        with open(path, "ab") as fh:
+            fh.truncate(valid_bytes)
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    # -- writes -----------------------------------------------------------
+
+    def add(self, ids: Iterable[int], vectors: np.ndarray):
+        ids = np.asarray(list(ids), dtype=np.int64)
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2 or vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"Expected {len(ids)} x {self.dim} vectors, got {vectors.shape}")
+        if not len(ids):
+            return
+
+        with self._locked():
+            self._refresh(force=True)
+            m = self.manifest
+            row_bytes = self.dim * self.dtype.itemsize
+            start = 0
+            while start < len(ids):
+                if not m["segments"] or m["segments"][-1]["rows"] >= self.segment_rows:
+                    m["segments"].append({"name": f"seg-{m['next_seg']:06d}", "rows": 0})
+                    m["next_seg"] += 1
+                seg = m["segments"][-1]
+                n = min(self.segment_rows - seg["rows"], len(ids) - start)
+                part = slice(start, start + n)
+                self._append(self._file(seg["name"] + ".vec"), seg["rows"] * row_bytes,
+                             vectors[part].astype(self.dtype).tobytes())
+                self._append(self._file(seg["name"] + ".ids"), seg["rows"] * 8, ids[part].tobytes())
+                seg["rows"] += n
+                start += n
+            self._write_manifest(m)
+            self._refresh(force=True)
+
+    def delete(self, ids: Iterable[int]):
+        """Tombstone ids; their rows are dropped for good by compact()"""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if not len(ids):
+            return
+        with self._locked():
+            self._refresh(force=True)
+            m = self.manifest
+            self._append(self._file(m["tomb_file"]), m["tomb_count"] * 8, ids.tobytes())
+            m["tomb_count"] += len(ids)
+            self._write_manifest(m)
+            self._refresh(force=True)
+
+    def compact(self):
+        """Rewrite all live rows into fresh segments and swap the manifest atomically.
+
+        Readers holding the old segments keep working on them (the files are
+        unlinked, not truncated) until they next refresh.
+        """
+        with self._locked():
+            self._refresh(force=True)
+            old = self.manifest
+            generation = old["generation"] + 1
+            new = dict(old, segments=[], generation=generation, tomb_count=0, tomb_file=f"tomb-{generation:06d}.ids")
+            seg = None
+            for vecs, ids in self._iter_blocks(old["segments"]):
+                live = ~np.isin(ids, self._tombstones)
+                vecs, ids = vecs[live], ids[live]
+                pos = 0
+                while pos < len(ids):
+                    if seg is None or seg["rows"] >= self.segment_rows:
+                        seg = {"name": f"seg-{new['next_seg']:06d}", "rows": 0}
+                        new["segments"].append(seg)
+                        new["next_seg"] += 1
+                    n = min(self.segment_rows - seg["rows"], len(ids) - pos)
+                    row_bytes = self.dim * self.dtype.itemsize
+                    self._append(self._file(seg["name"] + ".vec"), seg["rows"] * row_bytes,
+                                 np.ascontiguousarray(vecs[pos:pos + n]).tobytes())
+                    self._append(self._file(seg["name"] + ".ids"), seg["rows"] * 8, ids[pos:pos + n].tobytes())
+                    seg["rows"] += n
+                    pos += n
+            self._write_manifest(new)
+
+            for s in old["segments"]:
+                for ext in (".vec", ".ids"):
+                    try:
+                        os.unlink(self._file(s["name"] + ext))
+                    except FileNotFoundError:
+                        pass
+            try:
+                os.unlink(self._file(old["tomb_file"]))
+            except FileNotFoundError:
+                pass
+            self._refresh(force=True)
+        logger.info(f"Vector store compacted to {len(self)} rows in {len(self.manifest['segments'])} segments")
+
+    # -- reads ------------------------------------------------------------
+
+    def _iter_blocks(self, segments):
+        for seg in segments:
+            if not seg["rows"]:
+                continue
+            vecs, ids = self._segment_maps(seg)
+            for start in range(0, seg["rows"], self.block_rows):
+                yield vecs[start:start + self.block_rows], np.asarray(ids[start:start + self.block_rows])
+
+    def _read(self, fn):
+        """Run fn against the current manifest.
+
+        A handle that read the manifest just before another process's
+        compact() may find a segment it hadn't mapped yet unlinked; the
+        manifest then names the new segments, so refresh and retry once.
+        """
+        self._refresh()
+        try:
+            return fn()
+        except FileNotFoundError:
+            self._refresh(force=True)
+            return fn()
+
+    def _count_dead(self) -> int:
+        # tombstones of ids that were never stored (or deleted twice) don't count
+        if self._dead_rows is None:
+            dead = 0
+            if len(self._tombstones):
+                for seg in self.manifest["segments"]:
+                    if not seg["rows"]:
+                        continue
+                    _, ids = self._segment_maps(seg)
+                    for start in range(0, seg["rows"], self.block_rows):
+                        dead += int(np.isin(ids[start:start + self.block_rows], self._tombstones).sum())
+            self._dead_rows = dead
+        return self._dead_rows
+
+    def __len__(self) -> int:
+        return self._read(lambda: sum(s["rows"] for s in self.manifest["segments"]) - self._count_dead())
+
+    def search(self, q_vec: np.ndarray, k: int = 3) -> List[Tuple[int, float]]:
+        """Top-k (id, inner product) over live rows, scanning block by block"""
+        q = np.asarray(q_vec, dtype=np.float32).reshape(-1)
+        return self._read(lambda: self._search(q, k))
+
+    def _search(self, q: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        best_ids = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for vecs, ids in self._iter_blocks(self.manifest["segments"]):
+            scores = np.asarray(vecs, dtype=np.float32) @ q
+            if len(self._tombstones):
+                scores[np.isin(ids, self._tombstones)] = -np.inf
+            best_ids = np.concatenate([best_ids, ids])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > k:
+                top = np.argpartition(-best_scores, k)[:k]
+                best_ids, best_scores = best_ids[top], best_scores[top]
+        order = np.argsort(-best_scores)[:k]
+        return [(int(best_ids[i]), float(best_scores[i])) for i in order if np.isfinite(best_scores[i])]
+
+    # -- EmbeddingsIndex integration --------------------------------------
+
+    def add_texts(self, ids: Iterable[int], texts: List[str]):
+        if self.encoder is None:
+            raise RuntimeError("No encoder configured for this vector store")
+        self.add(ids, self.encoder.encode(texts))
+
+    def query(self, q: str, k: int = 3) -> List[Tuple[int, float]]:
+        if self.encoder is None:
+            raise RuntimeError("No encoder configured for this vector store")
+        if not q.strip():
+            return []
+        return self.search(self.encoder.encode([q])[0], k)
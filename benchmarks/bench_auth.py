@@ -0,0 +1,101 @@
+"""Login storm vs. threadpool latency, and cached token verification.
+
+Fires concurrent /api/auth/login requests while probing a sync endpoint
+(which needs a threadpool thread, like /api/analyze does) and reports
+login throughput plus probe latency. Run once with bcrypt on the shared
+threadpool (the old behaviour) and once on the dedicated auth executor.
+
+Run with:
+    python -m benchmarks.bench_auth --logins 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.app import api, auth, database
+from backend.app.main import create_app
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+async def _shared_pool_verify(plain, hashed):
+    return await run_in_threadpool(auth.verify_password, plain, hashed)
+
+
+async def storm(app, logins: int, probes: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        probe_latencies = []
+
+        async def probe():
+            for _ in range(probes):
+                t0 = time.perf_counter()
+                await client.get("/health")
+                probe_latencies.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.01)
+
+        async def login():
+            r = await client.post("/api/auth/login", data={"email": EMAIL, "password": PASSWORD})
+            r.raise_for_status()
+
+        t0 = time.perf_counter()
+        await asyncio.gather(probe(), *(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - t0
+
+    probe_latencies.sort()
+    return {
+        "logins_per_s": logins / elapsed,
+        "probe_p50_ms": statistics.median(probe_latencies) * 1000,
+        "probe_p95_ms": probe_latencies[int(len(probe_latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def bench_decode(n: int):
+    token = auth.create_access_token(1)
+    auth._token_cache.clear()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        auth._token_cache.clear()
+        auth.decode_token(token)
+    cold = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for _ in range(n):
+        auth.decode_token(token)
+    warm = (time.perf_counter() - t0) / n
+    return cold * 1e6, warm * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--logins", type=int, default=200)
+    ap.add_argument("--probes", type=int, default=50)
+    ap.add_argument("--decodes", type=int, default=5000)
+    args = ap.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    database.Base.metadata.create_all(engine)
+    api.SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    with api.SessionLocal() as db:
+        api.crud.create_user(db, EMAIL, PASSWORD)
+    app = create_app()
+
+    dedicated = api.verify_password_async
+    for label, verify in (("shared threadpool", _shared_pool_verify), ("dedicated executor", dedicated)):
+        api.verify_password_async = verify
+        res = asyncio.run(storm(app, args.logins, args.probes))
+        print(f"{label:<20} logins/s={res['logins_per_s']:7.1f}  "
+              f"probe p50={res['probe_p50_ms']:7.1f}ms  p95={res['probe_p95_ms']:7.1f}ms")
+    api.verify_password_async = dedicated
+
+    cold, warm = bench_decode(args.decodes)
+    print(f"token verify: jwt.decode {cold:.1f}us  cached {warm:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
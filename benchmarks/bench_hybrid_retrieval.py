@@ -0,0 +1,89 @@
+"""Dense-only vs BM25-prefiltered hybrid retrieval.
+
+Reports how many texts each strategy sends to the encoder and how much of
+the dense-only top-k the hybrid retriever still finds (recall@k).
+
+Run with:
+    python -m benchmarks.bench_hybrid_retrieval --docs 2000 --queries 50
+"""
+import argparse
+import random
+import time
+from backend.app.config import Config
+from backend.services.embeddings_index import EmbeddingsIndex
+from backend.services.hybrid_index import HybridIndex
+
+SKILLS = [
+    "python", "java", "go", "rust", "docker", "kubernetes", "aws", "gcp", "azure",
+    "terraform", "fastapi", "django", "react", "typescript", "postgresql", "redis",
+    "kafka", "spark", "airflow", "pytorch", "tensorflow", "sql", "graphql", "linux",
+    "ci/cd", "microservices", "nlp", "etl", "grafana", "prometheus",
+]
+FILLER = [
+    "designed", "led", "built", "maintained", "improved", "reduced latency of",
+    "migrated", "owned", "scaled", "mentored engineers on", "delivered", "automated",
+]
+
+
+def make_corpus(n_docs: int, rng: random.Random):
+    docs = []
+    for _ in range(n_docs):
+        words = [rng.choice(FILLER)] + rng.sample(SKILLS, 3)
+        docs.append(f"{words[0]} a platform using {words[1]}, {words[2]} and {words[3]}.")
+    return docs
+
+
+def make_queries(n_queries: int, rng: random.Random):
+    return [f"Looking for experience with {' and '.join(rng.sample(SKILLS, 2))}" for _ in range(n_queries)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--docs", type=int, default=2000)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--k", type=int, default=3)
+    ap.add_argument("--prefilter-k", type=int, default=Config.HYBRID_PREFILTER_K)
+    ap.add_argument("--fusion", default=Config.HYBRID_FUSION)
+    ap.add_argument("--alpha", type=float, default=Config.HYBRID_ALPHA)
+    ap.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    docs = make_corpus(args.docs, rng)
+    queries = make_queries(args.queries, rng)
+
+    # Dense-only: every document plus every query is encoded
+    t0 = time.perf_counter()
+    dense = EmbeddingsIndex(args.model)
+    dense.build(docs)
+    dense_top = [dense.query(q, k=args.k) for q in queries]
+    dense_time = time.perf_counter() - t0
+    dense_encodes = len(docs) + len(queries)
+
+    t0 = time.perf_counter()
+    hybrid = HybridIndex(args.model, prefilter_k=args.prefilter_k, alpha=args.alpha, fusion=args.fusion)
+    hybrid.build(docs)
+    hybrid_top = [[t for t, _ in hybrid.query(q, k=args.k)] for q in queries]
+    hybrid_time = time.perf_counter() - t0
+
+    # Tie-aware recall: a hybrid hit counts if its dense score reaches the
+    # dense-only k-th best score (synthetic docs often share a score).
+    hits = total = 0
+    for q, d_top, h_top in zip(queries, dense_top, hybrid_top):
+        all_scores = dict(dense.query(q, k=len(docs)))
+        threshold = d_top[-1][1] - 1e-6
+        hits += sum(1 for t in h_top if all_scores[t] >= threshold)
+        total += len(d_top)
+    total = total or 1
+
+    print(f"docs={len(docs)} queries={len(queries)} k={args.k} prefilter_k={args.prefilter_k} "
+          f"fusion={args.fusion} alpha={args.alpha}")
+    print(f"dense-only : {dense_encodes:>8} texts encoded  {dense_time:8.2f}s")
+    print(f"hybrid     : {hybrid.encode_calls:>8} texts encoded  {hybrid_time:8.2f}s")
+    print(f"encodes saved: {dense_encodes - hybrid.encode_calls} ({1 - hybrid.encode_calls / dense_encodes:.1%})")
+    print(f"recall@{args.k} vs dense-only: {hits / total:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Private memory of a worker searching an MmapVectorStore as it grows.
+
+Appends random unit vectors in steps and, after each step, opens the store
+from scratch (as a fresh worker would) and runs searches, reporting the
+process's anonymous RSS (private memory) next to the on-disk size.
+
+Run with:
+    python -m benchmarks.bench_vector_store --steps 4 --rows-per-step 250000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from backend.services.vector_store import MmapVectorStore
+
+
+def rss_anon_mb() -> float:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--steps", type=int, default=4)
+    ap.add_argument("--rows-per-step", type=int, default=250_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--dtype", default="float16")
+    ap.add_argument("--queries", type=int, default=5)
+    args = ap.parse_args()
+
+    path = tempfile.mkdtemp(prefix="vecstore-")
+    rng = np.random.default_rng(0)
+    try:
+        MmapVectorStore(path, dim=args.dim, dtype=args.dtype)
+        next_id = 0
+        for step in range(args.steps):
+            writer = MmapVectorStore(path)
+            for start in range(0, args.rows_per_step, 50_000):
+                n = min(50_000, args.rows_per_step - start)
+                v = rng.normal(size=(n, args.dim)).astype(np.float32)
+                v /= np.linalg.norm(v, axis=1, keepdims=True)
+                writer.add(range(next_id, next_id + n), v)
+                next_id += n
+            del writer
+
+            reader = MmapVectorStore(path)
+            q = rng.normal(size=args.dim).astype(np.float32)
+            t0 = time.perf_counter()
+            for _ in range(args.queries):
+                reader.search(q, k=10)
+            per_query = (time.perf_counter() - t0) / args.queries
+            disk_mb = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2**20
+            print(f"rows={len(reader):>10}  disk={disk_mb:8.1f}MB  private RSS={rss_anon_mb():7.1f}MB  "
+                  f"search={per_query * 1000:8.1f}ms")
+            del reader
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 // Global state
 let token = null;
 let currentUser = null;
+// Idempotency-Key for the current resume + JD; kept across resubmits and retries until one succeeds
+let analyzeIdempotencyKey = null;
 
 // DOM Elements
 const loadingOverlay = document.getElementById('loadingOverlay');
@@ -118,9 +120,17 @@ document.querySelectorAll('.tab-btn').forEach(btn => {
     });
 });
 
+// A changed resume or JD is a new request: it gets a new Idempotency-Key
+function resetAnalyzeKey() {
+    analyzeIdempotencyKey = null;
+}
+
+jdInput?.addEventListener('input', resetAnalyzeKey);
+
 // File upload display update
 if (resumeInput) {
     resumeInput.addEventListener('change', (e) => {
+        resetAnalyzeKey();
         const fileName = e.target.files[0]?.name || 'Choose file or drag here';
         const fileDisplay = document.querySelector('.file-name');
         if (fileDisplay) {
@@ -303,14 +313,24 @@ async function analyzeResume(e) {
         formData.append('resume', file);
         formData.append('jd', jd);
         
+        // One key per resume + JD: a double submit, a resubmit after an error and
+        // apiRequest's retries all replay it instead of re-running the analysis
+        if (!analyzeIdempotencyKey) {
+            analyzeIdempotencyKey = window.crypto && crypto.randomUUID
+                ? crypto.randomUUID()
+                : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        }
+        
         const data = await apiRequest('/api/analyze', {
             method: 'POST',
             headers: {
-                'Authorization': `Bearer ${token}`
+                'Authorization': `Bearer ${token}`,
+                'Idempotency-Key': analyzeIdempotencyKey
             },
             body: formData
         });
         
+        resetAnalyzeKey();
         hideLoading();
         displayResults(data);
         showToast('Analysis completed successfully!', 'success');
@@ -371,7 +391,44 @@ function displayResults(data) {
     
     // Display analysis
     const analysisText = document.getElementById('analysisText');
-    analysisText.textContent = data.analysis || 'No detailed analysis available.';
+    let text = data.analysis || 'No detailed analysis available.';
+    
+    // Structured gap analysis (single-call mode)
+    const gaps = data.gaps || [];
+    if (gaps.length > 0) {
+        text += '\n\nRequirement coverage:\n' + gaps
+            .map(g => `• [${g.status}] ${g.requirement}${g.evidence ? ' — ' + g.evidence : ''}`)
+            .join('\n');
+    }
+    analysisText.textContent = text;
+    
+    // Degraded (non-LLM) result: offer the AI narrative as a follow-up call
+    if (data.degraded && data.analysis_id) {
+        const btn = document.createElement('button');
+        btn.className = 'btn btn-secondary';
+        btn.textContent = 'Get AI narrative';
+        btn.addEventListener('click', () => upgradeNarrative(data, btn));
+        analysisText.appendChild(document.createElement('br'));
+        analysisText.appendChild(btn);
+    }
+}
+
+async function upgradeNarrative(data, btn) {
+    btn.disabled = true;
+    showLoading('Generating AI narrative...');
+    try {
+        const upgraded = await apiRequest(`/api/analyze/${data.analysis_id}/narrative`, {
+            method: 'POST',
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        }, 0);
+        hideLoading();
+        displayResults({ ...data, ...upgraded });
+    } catch (error) {
+        btn.disabled = false;
+        handleError(error, 'AI narrative is not available yet, please try again later');
+    }
 }
 
 
@@ -447,6 +504,13 @@ function displayRewriteResults(data) {
             formattedResult += '=== SKILLS ===\n\n';
             formattedResult += data.skills.join(' • ') + '\n';
         }
+        
+        if (data.other && Array.isArray(data.other)) {
+            data.other.forEach(sec => {
+                const title = sec.title ? '=== ' + sec.title.toUpperCase() + ' ===\n\n' : '';
+                formattedResult += '\n' + title + sec.text + '\n';
+            });
+        }
     } else if (data.rewritten) {
         formattedResult = data.rewritten;
     } else {
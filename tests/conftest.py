@@ -0,0 +1,31 @@
+import hashlib
+import numpy as np
+import pytest
+from backend.services import embeddings_index
+from backend.services.ats_scoring import tokenize
+
+
+class FakeEncoder:
+    """Hashed bag-of-words stand-in for SentenceTransformer (no download)"""
+
+    dim = 64
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, batch_size=16, convert_to_numpy=True, normalize_embeddings=True):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for tok in tokenize(text):
+                out[row, int(hashlib.md5(tok.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.encoded += len(texts)
+        return out / norms
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    enc = FakeEncoder()
+    monkeypatch.setattr(embeddings_index, "_embedding_model", enc)
+    return enc
@@ -0,0 +1,45 @@
+from backend.app.api import retrieve_context
+from backend.services.analysis_inputs import embed_analysis_inputs
+from backend.services.ats_scoring import semantic_score
+from backend.services.basic_analysis import section_similarity, section_scores
+from backend.services.coverage import CoverageEngine, coverage_results
+
+RESUME = """Jane Doe
+
+Summary
+Backend engineer building Python services on AWS.
+
+Experience
+Acme Corp - Senior Engineer (2020 - Present)
+Built Python APIs with FastAPI and PostgreSQL.
+Deployed Docker containers to Kubernetes.
+
+Skills
+Python, FastAPI, PostgreSQL, Docker
+"""
+
+JD = """Requirements:
+- 3+ years of Python backend development
+- Experience deploying Docker containers on Kubernetes
+- Strong PostgreSQL query tuning skills
+"""
+
+
+def test_one_encode_serves_every_stage(fake_encoder, monkeypatch):
+    calls = []
+    encode = fake_encoder.encode
+    monkeypatch.setattr(fake_encoder, "encode", lambda texts, **kw: calls.append(len(texts)) or encode(texts, **kw))
+
+    embedded = embed_analysis_inputs(RESUME, JD)
+    score = round(float(embedded["resume_vec"] @ embedded["jd_vec"]) * 100, 2)
+    coverage = coverage_results(embedded["requirements"], embedded["req_vecs"],
+                                [embedded["chunks"]], embedded["chunk_vecs"])[0]
+    sections = section_scores(embedded["sections"], embedded["section_vecs"], embedded["jd_vec"])
+    context = retrieve_context(RESUME, JD, k=2, embedded=embedded)
+    assert len(calls) == 1
+
+    # same results as the stages computing their own vectors
+    assert score == semantic_score(RESUME, JD)
+    assert coverage == CoverageEngine().score(RESUME, JD)
+    assert sections == section_similarity(RESUME, JD)
+    assert len(context) == 2 and all(c in embedded["chunks"] for c in context)
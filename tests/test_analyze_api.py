@@ -0,0 +1,178 @@
+import time
+import threading
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.app import api
+from backend.app.auth import get_current_user
+from backend.app.database import Base
+from backend.services import job_artifacts
+
+RESUME = b"Backend developer with six years of Python, FastAPI and PostgreSQL. Deployed services with Docker."
+OTHER_RESUME = b"Retail store manager. Scheduling staff, handling inventory and training new employees."
+JD = "Python backend engineer: FastAPI, PostgreSQL, Docker and Kubernetes."
+
+
+class FakeLLM:
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def keywords(self, jd, timeout=None, cancel=None):
+        if self.down:
+            raise ConnectionError("LLM down")
+        return {"skills": ["Python", "Kubernetes"], "tools": [], "soft_skills": []}
+
+    def narrative(self, prompt, **kwargs):
+        if self.down:
+            raise ConnectionError("LLM down")
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(5)
+        return "Strong Python match."
+
+
+@pytest.fixture
+def llm(tmp_path, monkeypatch, fake_encoder):
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    monkeypatch.setattr(api, "SessionLocal", Session)
+    fake = FakeLLM()
+    monkeypatch.setattr(api, "extract_keywords_llm", fake.keywords)
+    monkeypatch.setattr(api, "call_ollama", fake.narrative)
+    monkeypatch.setattr(api.Config, "ANALYZE_MODE", "two_call")
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(api.router)
+    app.dependency_overrides[api.get_db] = get_db
+    app.dependency_overrides[get_current_user] = lambda: 1
+    fake.client = TestClient(app)
+    return fake
+
+
+def analyze(llm, resume=RESUME, jd=JD, key=None, deadline=None):
+    headers = {"Idempotency-Key": key} if key else {}
+    if deadline is not None:
+        headers["X-Request-Deadline"] = str(deadline)
+    return llm.client.post("/analyze", files={"resume": ("r.txt", resume, "text/plain")},
+                           data={"jd": jd}, headers=headers)
+
+
+def test_idempotent_replay_conflict_and_reuse(llm):
+    first = analyze(llm, key="k1")
+    assert first.status_code == 200
+    body = first.json()
+    assert body["reused"] is False and body["degraded"] is False
+    assert body["analysis"] == "Strong Python match."
+
+    replay = analyze(llm, key="k1")
+    assert replay.status_code == 200
+    assert replay.json()["reused"] is True
+    assert replay.json()["analysis_id"] == body["analysis_id"]
+
+    assert analyze(llm, resume=OTHER_RESUME, key="k1").status_code == 409
+
+    # same file and JD without a key: the stored analysis is reused
+    again = analyze(llm)
+    assert again.json()["reused"] is True and again.json()["analysis_id"] == body["analysis_id"]
+    assert llm.calls == 1
+
+
+def test_degraded_results_are_not_reused(llm):
+    llm.down = True
+    first = analyze(llm)
+    assert first.status_code == 200 and first.json()["degraded"] is True
+
+    llm.down = False
+    second = analyze(llm)
+    assert second.json()["reused"] is False and second.json()["degraded"] is False
+    assert second.json()["analysis_id"] != first.json()["analysis_id"]
+
+
+def test_key_in_flight_with_other_payload_conflicts(llm):
+    llm.release.clear()
+    responses = {}
+    t = threading.Thread(target=lambda: responses.setdefault("first", analyze(llm, key="k2")))
+    t.start()
+    try:
+        assert llm.entered.wait(5)
+        # nothing is saved yet; the in-flight claim still rejects the reused key
+        assert analyze(llm, resume=OTHER_RESUME, key="k2").status_code == 409
+    finally:
+        llm.release.set()
+        t.join(10)
+    assert responses["first"].status_code == 200
+
+
+def test_upload_validated_before_hashing(llm):
+    resp = llm.client.post("/analyze", files={"resume": ("r.exe", b"MZ" * 100, "application/octet-stream")},
+                           data={"jd": JD})
+    assert resp.status_code == 400
+
+
+def test_deadline_covers_resume_parsing(llm, monkeypatch):
+    parse = api.parse_upload
+    monkeypatch.setattr(api, "parse_upload", lambda f: time.sleep(0.5) or parse(f))
+    start = time.perf_counter()
+    assert analyze(llm, deadline=0.2).status_code == 504
+    assert time.perf_counter() - start < 0.45
+
+
+def test_request_sharing_a_run_keeps_its_deadline_and_key(llm, monkeypatch):
+    monkeypatch.setattr(api.Config, "ANALYZE_REUSE_MAX_AGE_S", 0)
+    llm.release.clear()
+    responses = {}
+    owner = threading.Thread(target=lambda: responses.setdefault("owner", analyze(llm, key="k3")))
+    owner.start()
+    try:
+        assert llm.entered.wait(5)
+        start = time.perf_counter()
+        assert analyze(llm, key="k4", deadline=0.2).status_code == 504
+        assert time.perf_counter() - start < 2
+        waiter = threading.Thread(target=lambda: responses.setdefault("waiter", analyze(llm, key="k5")))
+        waiter.start()
+        time.sleep(0.3)  # joins the run in flight
+    finally:
+        llm.release.set()
+        owner.join(10)
+    waiter.join(10)
+    assert responses["waiter"].json()["reused"] is True
+    analysis_id = responses["owner"].json()["analysis_id"]
+    assert responses["waiter"].json()["analysis_id"] == analysis_id
+
+    # the waiter's key was recorded: its retry replays instead of recomputing
+    retry = analyze(llm, key="k5")
+    assert retry.json()["reused"] is True and retry.json()["analysis_id"] == analysis_id
+    assert llm.calls == 1
+
+
+def test_posting_routes_and_artifacts_task(llm, monkeypatch):
+    monkeypatch.setattr(job_artifacts, "extract_keywords_llm", llm.keywords)
+    created = llm.client.post("/postings", data={"title": "Backend", "jd": JD})
+    assert created.status_code == 200
+    posting_id = created.json()["id"]
+    # the background task has run by the time TestClient returns
+    assert llm.client.get(f"/postings/{posting_id}").json()["artifacts_status"] == "ready"
+    assert [p["id"] for p in llm.client.get("/postings").json()] == [posting_id]
+
+    matched = llm.client.post("/match", files={"resume": ("r.txt", RESUME, "text/plain")})
+    assert matched.json()["postings_scored"] == 1
+
+    updated = llm.client.put(f"/postings/{posting_id}", data={"status": "closed"})
+    assert updated.json()["status"] == "closed"
+    assert llm.client.put(f"/postings/{posting_id}", data={"status": "bogus"}).status_code == 400
+    assert llm.client.delete(f"/postings/{posting_id}").json() == {"deleted": posting_id}
+    assert llm.client.get(f"/postings/{posting_id}").status_code == 404
@@ -1,6 +1,34 @@
-from backend.app.auth import hash_password, verify_password
+import asyncio
+import pytest
+from fastapi import HTTPException
+from backend.app import auth
+from backend.app.auth import (
+    hash_password, verify_password, hash_password_async, verify_password_async,
+    create_access_token, decode_token,
+)
 
 def test_password_hash_verify():
     pw = "secret123"
     h = hash_password(pw)
     assert verify_password(pw, h)
+
+def test_password_hash_verify_async():
+    async def roundtrip():
+        h = await hash_password_async("secret123")
+        return await verify_password_async("secret123", h), await verify_password_async("wrong", h)
+    assert asyncio.run(roundtrip()) == (True, False)
+
+def test_decode_token_is_cached(monkeypatch):
+    auth._token_cache.clear()
+    token = create_access_token(42)
+    assert decode_token(token) == 42
+    def boom(*a, **kw):
+        raise AssertionError("jwt.decode should not run for a cached token")
+    monkeypatch.setattr(auth.jwt, "decode", boom)
+    assert decode_token(token) == 42
+
+def test_invalid_token_not_cached():
+    auth._token_cache.clear()
+    with pytest.raises(HTTPException):
+        decode_token("not-a-token")
+    assert len(auth._token_cache) == 0
@@ -0,0 +1,64 @@
+from backend.services.basic_analysis import (
+    jd_terms, keyword_match, section_similarity, coverage_gaps, deterministic_analysis,
+)
+
+RESUME = """Jane Doe
+
+Summary
+Backend engineer building Python services on AWS.
+
+Experience
+Acme Corp - Senior Engineer
+Built Python APIs with FastAPI and PostgreSQL.
+
+Skills
+Python, FastAPI, PostgreSQL, Docker
+"""
+
+JD = """We are hiring a backend engineer.
+Requirements:
+- Python and FastAPI services
+- Kubernetes and Terraform in production
+- Kubernetes cluster operations
+"""
+
+
+def test_jd_terms_skip_stopwords():
+    terms = jd_terms(JD)
+    assert terms[0] == "kubernetes"
+    assert "and" not in terms and "the" not in terms
+
+
+def test_keyword_match_uses_llm_skills_when_given():
+    matched, missing = keyword_match(RESUME, JD, {"skills": ["Python", "Kubernetes", "REST APIs"]})
+    assert matched == ["Python"]
+    assert missing == ["Kubernetes", "REST APIs"]
+
+    matched, missing = keyword_match(RESUME, JD)
+    assert "python" in matched and "kubernetes" in missing
+
+
+def test_section_similarity_scores_each_section(fake_encoder):
+    sections = section_similarity(RESUME, JD)
+    assert [s["kind"] for s in sections] == ["summary", "job", "skills"]
+    assert all(0 <= s["similarity"] <= 100 for s in sections)
+
+
+def test_deterministic_analysis_from_coverage():
+    coverage = {
+        "score": 50.0, "covered": 1, "total": 2,
+        "requirements": [
+            {"requirement": "Python and FastAPI services", "similarity": 0.8, "covered": True,
+             "evidence": "Built Python APIs with FastAPI"},
+            {"requirement": "Kubernetes and Terraform", "similarity": 0.1, "covered": False,
+             "evidence": "Skills"},
+        ],
+    }
+    sections = [{"section": "Skills", "kind": "skills", "similarity": 60.0},
+                {"section": "Summary", "kind": "summary", "similarity": 20.0}]
+    out = deterministic_analysis(72.0, coverage, sections, ["kubernetes"])
+    assert [g["status"] for g in out["gaps"]] == ["met", "missing"]
+    assert out["gaps"][1]["evidence"] == ""
+    assert "1 of 2" in out["analysis"] and "weakest: Summary" in out["analysis"]
+    assert "kubernetes" in out["analysis"]
+    assert coverage_gaps(None) == []
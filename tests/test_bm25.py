@@ -0,0 +1,34 @@
+import numpy as np
+from backend.services.bm25_index import BM25Index
+from backend.services.hybrid_index import HybridIndex
+
+DOCS = [
+    "Led a team of Python engineers building REST APIs with FastAPI",
+    "Managed quarterly budgets and vendor contracts",
+    "Deployed services to AWS using Docker and Terraform",
+    "Organised company social events",
+]
+
+def test_bm25_ranks_lexical_match_first():
+    idx = BM25Index()
+    idx.build(DOCS)
+    top = idx.query("python fastapi", k=2)
+    assert top[0][0] == DOCS[0]
+    assert all(score > 0 for _, score in top)
+
+def test_hybrid_only_encodes_prefiltered_candidates(fake_encoder):
+    idx = HybridIndex("fake", prefilter_k=2)
+    idx.build(DOCS)
+    top = idx.query("Docker AWS deployment", k=1)
+    assert top[0][0] == DOCS[2]
+    # query + at most prefilter_k candidates, never the whole corpus
+    assert fake_encoder.encoded <= 3
+    assert idx.encode_calls == fake_encoder.encoded
+
+def test_hybrid_with_vectors_scores_every_doc(fake_encoder):
+    idx = HybridIndex("fake", prefilter_k=1, alpha=0.9, fusion="weighted")
+    idx.build(DOCS, vectors=np.eye(4, dtype=np.float32))
+    # lexically only DOCS[2] matches, densely DOCS[3] does
+    top = idx.query("Docker AWS", k=2, q_vec=np.eye(4, dtype=np.float32)[3])
+    assert [t for t, _ in top] == [DOCS[3], DOCS[2]]
+    assert fake_encoder.encoded == 0
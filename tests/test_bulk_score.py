@@ -0,0 +1,56 @@
+import csv
+import json
+from backend.services.bulk_score import run, load_done, ResultWriter
+
+JD = "Python backend engineer with Docker and PostgreSQL"
+
+def _archive(tmp_path, n=5):
+    root = tmp_path / "resumes"
+    root.mkdir()
+    for i in range(n):
+        (root / f"r{i}.txt").write_text(f"Candidate {i}. Python developer, Docker, PostgreSQL, {i} years.")
+    (root / "empty.txt").write_bytes(b"")
+    return root
+
+def test_bulk_score_jsonl_and_resume(tmp_path, fake_encoder):
+    root = _archive(tmp_path)
+    out = tmp_path / "scores.jsonl"
+    # an interrupted run left one full record and a partial line
+    out.write_text(json.dumps({"file": "r0.txt", "score": 1.0, "matched_keywords": []}) + '\n{"file": "r1')
+    assert load_done(str(out)) == {"r0.txt"}
+
+    written = run(JD, str(root), str(out), workers=2, batch_size=2, use_llm=False, narratives=False)
+    assert written == 5  # r1..r4 plus the unparseable empty file
+    records = [json.loads(l) for l in out.read_text().splitlines()]
+    assert sorted(r["file"] for r in records) == ["empty.txt", "r0.txt", "r1.txt", "r2.txt", "r3.txt", "r4.txt"]
+    scored = [r for r in records if r["file"] == "r3.txt"][0]
+    assert scored["score"] > 0
+    assert "python" in scored["matched_keywords"]
+    assert [r for r in records if r["file"] == "empty.txt"][0]["error"]
+
+    assert run(JD, str(root), str(out), workers=2, batch_size=2, use_llm=False, narratives=False) == 0
+
+def test_bulk_score_csv(tmp_path, fake_encoder):
+    root = _archive(tmp_path, n=3)
+    out = tmp_path / "scores.csv"
+    run(JD, str(root), str(out), workers=1, batch_size=10, use_llm=False, narratives=False)
+    rows = list(csv.DictReader(out.open()))
+    assert len(rows) == 4
+    assert float([r for r in rows if r["file"] == "r1.txt"][0]["score"]) > 0
+
+def test_bulk_score_csv_trims_record_cut_inside_quoted_newline(tmp_path):
+    out = tmp_path / "scores.csv"
+    writer = ResultWriter(str(out))
+    writer.write({"file": "a.txt", "score": 50.0, "analysis": 'Good "fit".\n\nMissing AWS.'})
+    writer.write({"file": "b.txt", "score": 40.0, "analysis": "First paragraph.\nSecond paragraph."})
+    writer.close()
+    data = out.read_bytes()
+    out.write_bytes(data[:data.index(b"First paragraph.") + len(b"First paragraph.\n")])
+
+    assert load_done(str(out)) == {"a.txt"}
+    writer = ResultWriter(str(out))
+    writer.write({"file": "c.txt", "score": 30.0, "analysis": "ok"})
+    writer.close()
+    rows = list(csv.DictReader(out.open(newline="")))
+    assert [r["file"] for r in rows] == ["a.txt", "c.txt"]
+    assert rows[0]["analysis"] == 'Good "fit".\n\nMissing AWS.'
@@ -0,0 +1,35 @@
+import numpy as np
+from backend.services.coverage import CoverageEngine, coverage_matrix, split_requirements
+
+JD = """Requirements:
+- 3+ years of Python backend development
+- Experience deploying Docker containers on AWS
+- Strong PostgreSQL query tuning skills
+
+Benefits:
+- Dental plan"""
+
+def test_split_requirements_drops_headings_and_boilerplate():
+    reqs = split_requirements(JD)
+    assert len(reqs) == 3
+    assert reqs[0].startswith("3+ years")
+
+def test_coverage_matrix_many_resumes_many_jds():
+    eye = np.eye(4, dtype=np.float32)
+    # resume 0 has chunks on axes 0,1; resume 1 on axis 2
+    chunks = np.stack([eye[0], eye[1], eye[2]])
+    reqs = np.stack([eye[0], eye[1], eye[2], eye[3]])  # jd A: axes 0,1  jd B: axes 2,3
+    coverage, best_sim, _ = coverage_matrix(chunks, [2, 1], reqs, [2, 2])
+    assert coverage.shape == (2, 2)
+    assert np.allclose(coverage, [[1.0, 0.0], [0.0, 0.5]])
+    assert best_sim.shape == (2, 4)
+
+def test_engine_scores_pool_with_evidence(fake_encoder):
+    engine = CoverageEngine("fake")
+    strong = "Python backend development for 5 years.\n\nDeploying Docker containers on AWS.\n\nPostgreSQL query tuning."
+    weak = "Retail store manager.\n\nScheduling staff and handling inventory."
+    out = engine.score_many([strong, weak], JD)
+    assert out[0]["score"] > out[1]["score"]
+    docker = out[0]["requirements"][1]
+    assert "Docker" in docker["evidence"]
+    assert fake_encoder.encoded == 3 + 5  # requirements once, all chunks in one batch
@@ -0,0 +1,41 @@
+import threading
+import numpy as np
+from backend.services import embeddings_index
+from backend.services.embedding_server import EmbeddingServer, EmbeddingClient
+from backend.services.embeddings_index import EmbeddingsIndex
+
+def test_server_batches_requests_from_many_clients(tmp_path, fake_encoder):
+    enc = fake_encoder
+    sock = str(tmp_path / "embed.sock")
+    # the batch flushes only once it holds all eight texts (the wait is far
+    # longer than the test), so how the threads are scheduled doesn't matter
+    server = EmbeddingServer(sock, enc.encode, enc.dim, "fake", max_batch=8, max_wait_ms=60_000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = EmbeddingClient(sock)
+        texts = [f"python docker skill {i}" for i in range(8)]
+        results = [None] * len(texts)
+
+        def worker(i):
+            results[i] = client.encode([texts[i]])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        expected = enc.encode(texts)
+        assert np.allclose(np.vstack(results), expected)
+        # eight concurrent requests were coalesced into one model call
+        assert server.batcher.texts == 8
+        assert server.batcher.batches == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_embeddings_index_falls_back_when_server_down(tmp_path, monkeypatch, fake_encoder):
+    monkeypatch.setattr(embeddings_index.Config, "EMBEDDING_SERVER_SOCKET", str(tmp_path / "missing.sock"))
+    monkeypatch.setattr(embeddings_index, "_embedding_client", None)
+    vecs = EmbeddingsIndex("fake").encode(["python"])
+    assert vecs.shape == (1, fake_encoder.dim)
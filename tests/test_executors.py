@@ -0,0 +1,46 @@
+import time
+import asyncio
+import threading
+import pytest
+from backend.services import executors
+from backend.services.executors import InstrumentedExecutor
+from backend.services.pipeline import StageGraph
+
+
+def test_stats_track_queue_and_utilization():
+    ex = InstrumentedExecutor("t", max_workers=1)
+    gate = threading.Event()
+    first = ex.submit(gate.wait)
+    second = ex.submit(lambda: 2)
+    third = ex.submit(lambda: 3)
+    time.sleep(0.05)
+    stats = ex.stats()
+    assert stats["active"] == 1 and stats["queued"] == 2 and stats["utilization"] == 1.0
+    assert third.cancel()
+    gate.set()
+    assert second.result() == 2 and first.result() is True
+    ex.shutdown(wait=True)
+    stats = ex.stats()
+    assert stats == dict(stats, active=0, queued=0, completed=2)
+
+
+def test_stages_run_on_their_named_pool():
+    seen = {}
+    graph = StageGraph()
+    graph.add("encode", lambda: seen.setdefault("encode", threading.current_thread().name), pool="cpu")
+    graph.add("save", lambda: seen.setdefault("save", threading.current_thread().name), pool="db")
+    graph.add("other", lambda: seen.setdefault("other", threading.current_thread().name))
+    graph.run()
+    assert seen["encode"].startswith("cpu") and seen["save"].startswith("db")
+    assert seen["other"].startswith("pipeline")
+    assert executors.executor_stats()["cpu"]["completed"] >= 1
+
+
+def test_run_in_and_arun_wait_timeout():
+    gate = threading.Event()
+    with pytest.raises(TimeoutError):
+        executors.run_in("llm", gate.wait, 5, wait_timeout=0.05)
+    with pytest.raises(TimeoutError):
+        asyncio.run(executors.arun("llm", gate.wait, 5, wait_timeout=0.05))
+    gate.set()
+    assert executors.run_in("llm", lambda x, timeout=None: (x, timeout), 1, timeout=2, wait_timeout=1) == (1, 2)
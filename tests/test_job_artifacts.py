@@ -0,0 +1,43 @@
+import json
+import numpy as np
+from types import SimpleNamespace
+from backend.services.job_artifacts import (
+    compute_jd_artifacts, decode_artifacts, match_postings, pack_vectors,
+)
+
+RESUME = "Summary\nBackend engineer building Python services with FastAPI.\n\nSkills\nPython, FastAPI, PostgreSQL\n"
+JDS = {
+    1: "Backend engineer.\n- Python and FastAPI services\n- PostgreSQL database design\n",
+    2: "Platform engineer.\n- Kubernetes and Terraform in production\n- AWS networking experience\n",
+}
+
+
+def stored(art):
+    """What build_jd_artifacts writes to a JobDescription row"""
+    return SimpleNamespace(
+        keywords=json.dumps(art["keywords"]), requirements=json.dumps(art["requirements"]),
+        embedding=pack_vectors(art["jd_vec"]), requirement_embeddings=pack_vectors(art["req_vecs"]),
+        embedding_model=art["model"],
+    )
+
+
+def test_artifacts_roundtrip_through_storage(fake_encoder):
+    art = compute_jd_artifacts(JDS[1], use_llm=False)
+    assert art["requirements"] == ["Python and FastAPI services", "PostgreSQL database design"]
+    assert "fastapi" in art["keywords"]["skills"]
+    decoded = decode_artifacts(101, stored(art))
+    assert np.allclose(decoded["req_vecs"], art["req_vecs"])
+    assert decoded["requirements"] == art["requirements"]
+
+
+def test_match_ranks_postings_with_one_resume_encode(fake_encoder):
+    postings = [
+        {"id": pid, "title": f"job {pid}", "artifacts": decode_artifacts(200 + pid, stored(compute_jd_artifacts(jd, use_llm=False)))}
+        for pid, jd in JDS.items()
+    ]
+    before = fake_encoder.encoded
+    results = match_postings(RESUME, postings)
+    assert [r["posting_id"] for r in results] == [1, 2]
+    assert results[0]["coverage"] > results[1]["coverage"]
+    assert "kubernetes" in results[1]["missing_keywords"]
+    assert fake_encoder.encoded - before == 1 + 2  # whole resume + its chunks, nothing per posting
@@ -0,0 +1,136 @@
+import threading
+import pytest
+import requests
+from backend.services import ollama_client
+from backend.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeResponse:
+    def __init__(self, status=200, body=None):
+        self.status_code = status
+        self.ok = status < 400
+        self._body = body or {"response": "ok"}
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(response=self)
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    b = CircuitBreaker("ollama", failure_threshold=2, reset_timeout=60, probe=lambda: True)
+    monkeypatch.setattr(ollama_client, "breaker", b)
+    return b
+
+
+def test_breaker_opens_and_short_circuits(monkeypatch, breaker):
+    calls = []
+    def down(*args, **kwargs):
+        calls.append(kwargs["json"])
+        raise requests.exceptions.ConnectionError("refused")
+    monkeypatch.setattr(ollama_client.requests, "post", down)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            ollama_client.call_ollama("hello")
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        ollama_client.call_ollama("hello")
+    assert len(calls) == 2
+    assert calls[0]["keep_alive"] == ollama_client.settings.OLLAMA_KEEP_ALIVE
+
+
+def test_half_open_probe_recovers(monkeypatch, breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    breaker.opened_at -= 61
+    breaker.probe = lambda: False
+    assert not breaker.allow()
+    assert breaker.state == "open"
+
+    breaker.opened_at -= 61
+    breaker.probe = lambda: True
+    monkeypatch.setattr(ollama_client.requests, "post", lambda *a, **k: FakeResponse())
+    assert ollama_client.call_ollama("hello") == "ok"
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_client_errors_do_not_trip_breaker(monkeypatch, breaker):
+    monkeypatch.setattr(ollama_client.requests, "post", lambda *a, **k: FakeResponse(status=404))
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            ollama_client.call_ollama("hello", model="missing")
+    assert breaker.state == "closed"
+
+
+def test_unexpected_error_reports_trial_outcome(monkeypatch, breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.opened_at -= 61
+    def broken(*a, **k):
+        raise KeyError("boom")
+    monkeypatch.setattr(ollama_client.requests, "post", broken)
+    with pytest.raises(RuntimeError):
+        ollama_client.call_ollama("hello")
+    assert breaker.state == "open"
+
+
+def test_half_open_trial_times_out():
+    b = CircuitBreaker("x", failure_threshold=1, reset_timeout=10, probe=lambda: True, trial_timeout=5)
+    b.record_failure()
+    b.opened_at -= 11
+    assert b.allow() and b.state == "half_open"
+    assert not b.allow()
+    b.trial_started -= 6  # the trial call never reported success or failure
+    assert not b.allow()
+    assert b.state == "open"
+    b.opened_at -= 11
+    assert b.allow()
+
+
+def test_slow_trial_call_still_closes_breaker(monkeypatch):
+    trial_timeout = ollama_client.breaker.trial_timeout
+    assert trial_timeout == ollama_client.settings.OLLAMA_TIMEOUT
+    b = CircuitBreaker("ollama", failure_threshold=1, reset_timeout=30, probe=lambda: True,
+                       trial_timeout=trial_timeout)
+    monkeypatch.setattr(ollama_client, "breaker", b)
+    b.record_failure()
+    b.opened_at -= 31
+    during_trial = []
+    def slow(*a, **k):
+        b.trial_started -= 31  # longer than reset_timeout, within OLLAMA_TIMEOUT
+        during_trial.append(b.allow())
+        return FakeResponse()
+    monkeypatch.setattr(ollama_client.requests, "post", slow)
+    assert ollama_client.call_ollama("hello") == "ok"
+    # no second call was let through while the trial ran
+    assert during_trial == [False]
+    assert b.state == "closed"
+
+
+def test_abandoned_call_is_never_sent(monkeypatch, breaker):
+    sent = []
+    monkeypatch.setattr(ollama_client.requests, "post", lambda *a, **k: sent.append(1) or FakeResponse())
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(TimeoutError):
+        ollama_client.call_ollama("hello", cancel=cancel)
+
+    # all slots busy: the wait is bounded by the call's timeout
+    monkeypatch.setattr(ollama_client, "_llm_slots", threading.BoundedSemaphore(1))
+    ollama_client._llm_slots.acquire()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.opened_at -= 61
+    with pytest.raises(TimeoutError):
+        ollama_client.call_ollama("hello", timeout=0.05)
+    assert sent == []
+    # the unsent trial doesn't hold the circuit half-open: the next caller probes again
+    assert breaker.state == "open"
+    ollama_client._llm_slots.release()
+    assert ollama_client.call_ollama("hello") == "ok" and breaker.state == "closed"
@@ -0,0 +1,57 @@
+import time
+import pytest
+from backend.services.pipeline import StageGraph, StageFailed, DeadlineExceeded
+
+def test_independent_stages_run_concurrently():
+    graph = StageGraph()
+    graph.add("a", lambda: time.sleep(0.2) or 1)
+    graph.add("b", lambda: time.sleep(0.2) or 2)
+    graph.add("sum", lambda a, b: a + b, deps=["a", "b"])
+    start = time.perf_counter()
+    results = graph.run()
+    assert results["sum"] == 3
+    assert time.perf_counter() - start < 0.35
+
+def test_non_critical_failure_uses_default():
+    graph = StageGraph()
+    graph.add("score", lambda: 1 / 0, critical=False, default=0.0)
+    graph.add("out", lambda s: s + 1, deps=["score"])
+    assert graph.run()["out"] == 1.0
+
+def test_critical_failure_cancels_dependents():
+    ran = []
+    graph = StageGraph()
+    graph.add("resume", lambda: 1 / 0)
+    graph.add("after", lambda r: ran.append(r), deps=["resume"])
+    with pytest.raises(StageFailed) as exc:
+        graph.run()
+    assert exc.value.stage == "resume"
+    assert ran == []
+
+def test_deadline_exceeded():
+    graph = StageGraph(deadline=0.05)
+    graph.add("slow", lambda: time.sleep(0.3))
+    with pytest.raises(DeadlineExceeded):
+        graph.run()
+    assert graph.cancelled.is_set()
+
+def test_deadline_with_only_optional_stages_left_uses_defaults():
+    graph = StageGraph(deadline=0.1)
+    graph.add("fast", lambda: 1)
+    graph.add("llm", lambda: time.sleep(0.5) or "narrative", critical=False, default=None)
+    graph.add("after", lambda x: x, deps=["llm"], critical=False, default="skipped")
+    start = time.perf_counter()
+    results = graph.run()
+    assert time.perf_counter() - start < 0.3
+    assert results == {"fast": 1, "llm": None, "after": "skipped"}
+    assert sorted(graph.skipped) == ["after", "llm"]
+    assert graph.cancelled.is_set()
+
+def test_absolute_deadline_counts_time_before_the_graph():
+    deadline_at = time.monotonic() + 0.3
+    time.sleep(0.2)  # e.g. parsing, before the graph is built
+    graph = StageGraph(deadline_at=deadline_at)
+    graph.add("llm", lambda: time.sleep(0.5), critical=False, default=None)
+    start = time.perf_counter()
+    assert graph.run() == {"llm": None}
+    assert time.perf_counter() - start < 0.25
@@ -0,0 +1,51 @@
+from backend.services.prompt_builder import (
+    build_analysis_prompt, build_rewrite_prompt, estimate_tokens, strip_jd_boilerplate,
+)
+
+JD = """Senior Backend Engineer
+Requirements:
+- Python, FastAPI, PostgreSQL
+- Docker and AWS
+
+Benefits:
+- Health insurance and dental
+- Unlimited PTO
+
+We are an equal opportunity employer."""
+
+def test_strip_jd_boilerplate():
+    out = strip_jd_boilerplate(JD)
+    assert "FastAPI" in out
+    assert "dental" not in out
+    assert "Unlimited PTO" not in out
+    assert "equal opportunity" not in out
+
+def test_boilerplate_words_in_requirements_are_kept():
+    jd = """Dental Hygienist
+Requirements:
+- Licensed dental hygienist with 2+ years of clinical experience
+- Educate patients on the benefits of preventive care
+- Experience supporting patients with disabilities
+- Experience with Dentrix
+
+We offer: health insurance, 401(k) and paid time off.
+We are an equal opportunity employer."""
+    out = strip_jd_boilerplate(jd)
+    for kept in ("Licensed dental hygienist", "benefits of preventive care", "patients with disabilities", "Dentrix"):
+        assert kept in out
+    assert "401(k)" not in out and "equal opportunity" not in out
+
+def test_analysis_prompt_respects_budget():
+    chunks = [f"Built Python service number {i} " * 20 for i in range(10)]
+    prompt, tokens = build_analysis_prompt(chunks, JD, budget=300)
+    assert tokens == estimate_tokens(prompt)
+    assert tokens <= 300
+    # most relevant (first) chunk survives trimming
+    assert chunks[0] in prompt
+
+def test_rewrite_prompt_drops_least_relevant_paragraph():
+    resume = "Python FastAPI developer on AWS.\n\n" + "Hobbies: chess and hiking. " * 60
+    prompt, tokens = build_rewrite_prompt(resume, JD, budget=250)
+    assert tokens <= 250
+    assert "Python FastAPI developer" in prompt
+    assert "chess" not in prompt
@@ -0,0 +1,75 @@
+from backend.services import resume_rewriter
+from backend.services.cache import LRUCache
+from backend.app.config import Config
+from backend.services.resume_rewriter import split_sections, split_jobs, rewrite_resume_ats
+
+RESUME = """Jane Doe
+jane@example.com
+
+SUMMARY
+Backend developer with 5 years of Python.
+
+EXPERIENCE
+Senior Engineer, Acme (2021-2024)
+- Built billing APIs in FastAPI
+
+Engineer, Initech (2018-2021)
+- Maintained Django monolith
+
+Skills:
+Python, Django, FastAPI, Docker
+"""
+
+JD = "Looking for a Python backend engineer with FastAPI and Docker."
+
+def test_split_sections_one_unit_per_job():
+    kinds = [s["kind"] for s in split_sections(RESUME)]
+    assert kinds == ["other", "summary", "job", "job", "skills"]
+
+def test_split_jobs_keeps_multi_paragraph_entries_together():
+    experience = """Senior Engineer
+Acme Corp | Jan 2021 - Present
+Led the billing platform team.
+
+- Built billing APIs in FastAPI
+- Cut invoice latency by 40%
+
+- Mentored four engineers
+
+Engineer, Initech (2018-2021)
+Maintained a Django monolith.
+
+- Migrated it to Python 3
+"""
+    jobs = split_jobs(experience)
+    assert len(jobs) == 2
+    assert jobs[0].startswith("Senior Engineer") and "Mentored" in jobs[0]
+    assert jobs[1].startswith("Engineer, Initech") and jobs[1].endswith("Python 3")
+    assert split_jobs("Did many things\n\nAnd more things") == ["Did many things\n\nAnd more things"]
+
+def test_sections_rewritten_and_cached(monkeypatch):
+    calls = []
+    budgets = set()
+    def fake_ollama(prompt, **kw):
+        calls.append(prompt)
+        budgets.add(kw.get("num_predict"))
+        if kw.get("format") == "json":
+            return '{"skills": ["Python", "FastAPI", "Docker", "Django"]}'
+        return "REWRITTEN " + prompt.rsplit("SECTION:\n", 1)[1].splitlines()[0]
+    monkeypatch.setattr(resume_rewriter, "call_ollama", fake_ollama)
+    monkeypatch.setattr(resume_rewriter, "_section_cache", LRUCache(64))
+
+    out = rewrite_resume_ats(RESUME, JD)
+    assert out["summary"].startswith("REWRITTEN")
+    assert len(out["experience"]) == 2
+    assert out["skills"][0] == "Python"
+    assert out["other"][0]["text"].startswith("Jane Doe")
+    assert len(calls) == 4
+    # each kind of section gets its own generation budget
+    assert budgets == {Config.REWRITE_NUM_PREDICT_SUMMARY, Config.REWRITE_NUM_PREDICT_JOB,
+                       Config.REWRITE_NUM_PREDICT_SKILLS}
+
+    # editing one job only regenerates that job
+    edited = RESUME.replace("Maintained Django monolith", "Maintained and migrated Django monolith")
+    rewrite_resume_ats(edited, JD)
+    assert len(calls) == 5
@@ -0,0 +1,31 @@
+import time
+import threading
+import pytest
+from backend.services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    runs = []
+    def work():
+        runs.append(1)
+        time.sleep(0.2)
+        return {"analysis_id": 7}
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(flights.do("k", work))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(runs) == 1
+    assert sorted(shared for _, shared in out) == [False, True, True, True]
+    assert all(result == {"analysis_id": 7} for result, _ in out)
+    assert flights.in_flight() == 0
+
+
+def test_errors_propagate_and_are_not_kept():
+    flights = SingleFlight()
+    with pytest.raises(ZeroDivisionError):
+        flights.do("k", lambda: 1 / 0)
+    assert flights.do("k", lambda: 2) == (2, False)
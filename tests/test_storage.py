@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from backend.app import crud, models
+from backend.app.database import Base
+from backend.app.db_types import compress_text, decompress_text, RAW, ZLIB
+
+JD = "Senior Python engineer. Requirements: FastAPI, PostgreSQL, Kubernetes. " * 20
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_compress_roundtrip_and_short_values_stay_raw():
+    packed = compress_text(JD)
+    assert packed[:1] == ZLIB and len(packed) < len(JD) / 5
+    assert decompress_text(packed) == JD
+    assert compress_text("short")[:1] == RAW
+    assert decompress_text(compress_text("short")) == "short"
+    assert decompress_text("legacy plain text") == "legacy plain text"
+
+
+def test_analyses_share_one_compressed_jd(db):
+    user = crud.create_user(db, "a@b.co", password_hash="x")
+    resume = crud.save_resume(db, user.id, "r.txt", "Python developer " * 100)
+    for _ in range(3):
+        crud.save_analysis(db, resume.id, JD, 50.0, ["python"], "Good match. " * 50)
+    crud.save_analysis(db, resume.id, JD + "\n", 60.0, [], "Other")  # same JD, trailing whitespace
+
+    assert db.query(models.JobDescription).count() == 1
+    a = db.query(models.Analysis).first()
+    assert a.jd == JD.strip() and a.analysis_text == "Good match. " * 50
+
+    stored = db.execute(text("SELECT text FROM resumes")).scalar_one()
+    assert isinstance(stored, bytes) and len(stored) < 200
+
+
+def test_reusable_analysis_lookup(db):
+    user = crud.create_user(db, "b@b.co", password_hash="x")
+    resume = crud.save_resume(db, user.id, "r.txt", "Python developer", content_sha256="abc")
+    crud.save_analysis(db, resume.id, JD, 40.0, [], "quick", degraded=True, model="m", result={"score": 40.0})
+    assert crud.find_reusable_analysis(db, user.id, "abc", crud.jd_hash(JD), "m", 3600) is None
+
+    full = crud.save_analysis(db, resume.id, JD, 50.0, ["python"], "full", model="m",
+                              idempotency_key="k1", result={"score": 50.0})
+    assert crud.find_reusable_analysis(db, user.id, "abc", crud.jd_hash(JD), "m", 3600).id == full.id
+    assert crud.find_reusable_analysis(db, user.id, "abc", crud.jd_hash(JD), "other-model", 3600) is None
+    assert crud.get_analysis_by_idempotency_key(db, user.id, "k1", 3600).id == full.id
+    assert crud.get_analysis_by_idempotency_key(db, user.id + 1, "k1", 3600) is None
+
+
+def test_list_postings_hides_others_closed_postings_and_loads_jds_in_bulk(db):
+    alice = crud.create_user(db, "alice@b.co", password_hash="x")
+    bob = crud.create_user(db, "bob@b.co", password_hash="x")
+    for i in range(3):
+        crud.create_posting(db, alice.id, f"Open {i}", JD + str(i))
+    mine = crud.create_posting(db, bob.id, "Bob closed", JD + "bob")
+    crud.update_posting(db, mine, status="closed")
+    theirs = crud.create_posting(db, alice.id, "Alice closed", JD + "alice")
+    crud.update_posting(db, theirs, status="closed")
+    bob_id = bob.id
+    db.expunge_all()
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    postings = crud.list_postings(db, None, owner_id=bob_id)
+    texts = [p.job_description.text for p in postings]
+    assert len(statements) == 2  # postings, then all of their JDs with text
+    assert sorted(p.title for p in postings) == ["Bob closed", "Open 0", "Open 1", "Open 2"]
+    assert all(t.startswith("Senior Python") for t in texts)
+    assert [p.title for p in crud.list_postings(db, "closed", owner_id=bob_id)] == ["Bob closed"]
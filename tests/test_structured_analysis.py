@@ -0,0 +1,45 @@
+import json
+import pytest
+from backend.services import structured_analysis
+from backend.services.structured_analysis import analyze_structured, validate_analysis, StructuredOutputError
+
+GOOD = {
+    "keywords": {"skills": ["Python", "SQL"], "tools": ["Docker"], "soft_skills": []},
+    "gaps": [{"requirement": "AWS", "status": "Missing", "evidence": ""}],
+    "narrative": "Strong Python background, no cloud experience.",
+}
+
+def test_validate_analysis_normalizes():
+    out = validate_analysis(GOOD)
+    assert out["keywords"]["skills"] == ["Python", "SQL"]
+    assert out["gaps"][0]["status"] == "missing"
+
+def test_validate_analysis_rejects_bad_status():
+    bad = dict(GOOD, gaps=[{"requirement": "AWS", "status": "maybe"}])
+    with pytest.raises(StructuredOutputError):
+        validate_analysis(bad)
+
+def test_analyze_structured_single_call(monkeypatch):
+    calls = []
+    def fake_ollama(prompt, **kwargs):
+        calls.append(kwargs)
+        return json.dumps(GOOD)
+    monkeypatch.setattr(structured_analysis, "call_ollama", fake_ollama)
+    out = analyze_structured(["Python developer"], "Need Python, SQL, Docker and AWS")
+    assert len(calls) == 1
+    assert calls[0]["format"] == structured_analysis.ANALYSIS_SCHEMA
+    assert out["narrative"].startswith("Strong")
+    assert out["prompt_tokens"] > 0
+
+def test_analyze_structured_invalid_json_raises(monkeypatch):
+    monkeypatch.setattr(structured_analysis, "call_ollama", lambda prompt, **kw: "not json")
+    with pytest.raises(StructuredOutputError):
+        analyze_structured(["Python developer"], "Need Python and SQL experience")
+
+def test_analyze_structured_llm_errors_are_not_output_errors(monkeypatch):
+    def missing_model(prompt, **kw):
+        raise ValueError("Model 'x' not found")
+    monkeypatch.setattr(structured_analysis, "call_ollama", missing_model)
+    with pytest.raises(ValueError) as exc:
+        analyze_structured(["Python developer"], "Need Python and SQL experience")
+    assert not isinstance(exc.value, StructuredOutputError)
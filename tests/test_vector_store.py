@@ -0,0 +1,62 @@
+import os
+import numpy as np
+from backend.services.embeddings_index import EmbeddingsIndex
+from backend.services.vector_store import MmapVectorStore
+
+def _unit(rows, dim=8, seed=0):
+    v = np.random.default_rng(seed).normal(size=(rows, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+def test_add_search_across_segments_and_processes(tmp_path):
+    vecs = _unit(50)
+    store = MmapVectorStore(str(tmp_path), dim=8, dtype="float32", segment_rows=16, block_rows=7)
+    store.add(range(100, 150), vecs)
+    assert len(store.manifest["segments"]) == 4
+
+    # a second handle (another worker) sees the same data
+    other = MmapVectorStore(str(tmp_path))
+    top = other.search(vecs[37], k=3)
+    assert top[0][0] == 137
+    assert abs(top[0][1] - 1.0) < 1e-5
+
+def test_delete_and_compact(tmp_path):
+    vecs = _unit(20)
+    store = MmapVectorStore(str(tmp_path), dim=8, dtype="float16", segment_rows=8)
+    store.add(range(20), vecs)
+    store.delete([5])
+    store.delete([5, 999])  # repeated and unknown ids don't change the count
+    assert len(store) == 19
+    assert store.search(vecs[5], k=1)[0][0] != 5
+
+    store.compact()
+    assert len(store) == 19
+    assert store.manifest["tomb_count"] == 0
+    assert store.search(vecs[6], k=1)[0][0] == 6
+    assert sorted(p.name for p in tmp_path.glob("seg-*.vec")) == [s["name"] + ".vec" for s in store.manifest["segments"]]
+
+def test_half_written_append_is_ignored(tmp_path):
+    store = MmapVectorStore(str(tmp_path), dim=8, dtype="float32")
+    store.add([1, 2], _unit(2))
+    seg = store.manifest["segments"][0]["name"]
+    with open(tmp_path / f"{seg}.vec", "ab") as fh:
+        fh.write(b"\0" * 13)  # crash mid-append, manifest untouched
+    store.add([3], _unit(1, seed=3))
+    assert MmapVectorStore(str(tmp_path)).search(_unit(1, seed=3)[0], k=1)[0][0] == 3
+
+def test_text_api_uses_embeddings_index(tmp_path, fake_encoder):
+    store = MmapVectorStore(str(tmp_path), dim=fake_encoder.dim, encoder=EmbeddingsIndex("fake"))
+    store.add_texts([1, 2], ["python fastapi docker", "budget vendor contracts"])
+    assert store.query("docker python", k=1)[0][0] == 1
+
+def test_stale_reader_survives_compaction(tmp_path):
+    vecs = _unit(20)
+    writer = MmapVectorStore(str(tmp_path), dim=8, dtype="float32", segment_rows=8)
+    writer.add(range(20), vecs)
+    reader = MmapVectorStore(str(tmp_path))  # has read the manifest, mapped nothing yet
+    writer.delete([3])
+    writer.compact()
+    # pretend the manifest change went unnoticed (coarse mtime), so the reader
+    # still names the unlinked segments
+    reader._manifest_mtime = os.stat(tmp_path / "manifest.json").st_mtime_ns
+    assert reader.search(vecs[7], k=1)[0][0] == 7
+    assert len(reader) == 19